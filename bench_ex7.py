@@ -0,0 +1,171 @@
+# bench_ex7.py
+#
+# Reproducible benchmarks for the owner tree, the reports and the display filters.
+#   python bench_ex7.py --sizes 1000,10000,100000 --out bench.json
+#   python bench_ex7.py --sizes 1000,10000 --compare bench.json --threshold 0.25
+# Every case is built from seeded synthetic owners; "order" is the order owners are
+# inserted in: sorted by name, random, or adversarial (alternating ends of the name
+# range, which forces rebalancing on almost every insert).
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import ex7
+
+ORDERS = ("sorted", "random", "adversarial")
+FILTERS = (("type", "water"), ("evolvable", None), ("attack", 80), ("hp", 70), ("prefix", "s"))
+
+
+def make_owners(n, order, seed):
+    """
+    n (owner_name, [Pokemon]) records in the given insertion order.
+    """
+    rng = random.Random(seed)
+    data = ex7.get_hoenn_data()
+    names = [f"owner{i:07d}" for i in range(n)]
+    if order == "random":
+        rng.shuffle(names)
+    elif order == "adversarial":
+        names = [names[i // 2] if i % 2 == 0 else names[n - 1 - i // 2] for i in range(n)]
+    return [(name, rng.sample(data, rng.randint(1, 8))) for name in names]
+
+
+def timed(results, op, count, func):
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    results[op] = {"seconds": round(seconds, 6), "ops_per_sec": round(count / seconds, 1) if seconds else None}
+
+
+def build(records):
+    root = None
+    for owner_name, pokemons in records:
+        root = ex7.insert_owner_bst(root, ex7.new_owner_node(owner_name, pokemons))
+    return root
+
+
+def run_case(n, order, seed):
+    """
+    Time every operation for one (size, order) case. Return {op: {...}, "peak_bytes": ...}.
+    """
+    records = make_owners(n, order, seed)
+    rng = random.Random(seed + 1)
+    lookups = [name for name, _ in records]
+    rng.shuffle(lookups)
+    results = {}
+    ex7.clear_registry()
+
+    def insert_all():
+        ex7.ownerRoot = build(records)
+    timed(results, "insert_owner_bst", n, insert_all)
+    ex7.rebuild_count_index()
+    ex7.rebuild_owner_index()
+
+    def find_all():
+        for name in lookups:
+            ex7.find_owner_bst(ex7.ownerRoot, name)
+    timed(results, "find_owner_bst", n, find_all)
+
+    for op, traversal in ex7.TRAVERSALS.items():
+        timed(results, f"traverse_{op}", n, lambda: sum(1 for _ in traversal(ex7.ownerRoot)))
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        timed(results, "sort_owners_by_num_pokemon", n, ex7.sort_owners_by_num_pokemon)
+        timed(results, "print_in_order", n, lambda: ex7.in_order(ex7.ownerRoot))
+
+    for kind, value in FILTERS:
+        def filter_all():
+            for node in ex7.iter_in_order(ex7.ownerRoot):
+                ex7.query_owner_pokedex(node, kind, value)
+        timed(results, f"filter_{kind}", n, filter_all)
+
+    half = lookups[:n // 2]
+
+    def delete_half():
+        for name in half:
+            ex7.ownerRoot = ex7.delete_owner_bst(ex7.ownerRoot, name)
+    timed(results, "delete_owner_bst", len(half), delete_half)
+
+    ex7.clear_registry()
+    tracemalloc.start()
+    ex7.ownerRoot = build(records)
+    results["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    ex7.clear_registry()
+    return results
+
+
+def run_suite(sizes, orders, seed):
+    ex7.get_species_index()  # load the species table outside of the timings
+    cases = {}
+    for n in sizes:
+        for order in orders:
+            key = f"{n}/{order}"
+            print(f"running {key} ...", file=sys.stderr)
+            cases[key] = run_case(n, order, seed)
+    return {"python": platform.python_version(), "seed": seed, "cases": cases}
+
+
+def compare(current, baseline, threshold):
+    """
+    Return a list of "case op: old -> new ops/sec" lines for every operation that got
+    slower than baseline by more than threshold (0.2 = 20%).
+    """
+    regressions = []
+    for key, ops in current["cases"].items():
+        old_ops = baseline.get("cases", {}).get(key)
+        if old_ops is None:
+            continue
+        for op, result in ops.items():
+            if not isinstance(result, dict) or op not in old_ops:
+                continue
+            old, new = old_ops[op]["ops_per_sec"], result["ops_per_sec"]
+            if old and new and new < old * (1 - threshold):
+                regressions.append(f"{key} {op}: {old} -> {new} ops/sec")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ex7 owner tree, reports and filters.")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma separated owner counts (add 1000000 for the full run)")
+    parser.add_argument("--orders", default=",".join(ORDERS))
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--out", help="write results as JSON here")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON from an earlier run to gate against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="fail if any ops/sec drops by more than this fraction")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    orders = [order for order in args.orders.split(",") if order]
+    for order in orders:
+        if order not in ORDERS:
+            parser.error(f"unknown order '{order}'")
+
+    results = run_suite(sizes, orders, args.seed)
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
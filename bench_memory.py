@@ -0,0 +1,57 @@
+# bench_memory.py
+#
+# Bytes per owner for the dict owner nodes vs the compact OwnerNode / array('H') ones.
+#   python bench_memory.py --owners 100000 --max-dex 10
+
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+
+import ex7
+
+
+def make_records(owners, max_dex, seed):
+    rng = random.Random(seed)
+    data = ex7.get_hoenn_data()
+    return [(f"owner{i:07d}", rng.sample(data, rng.randint(1, max_dex))) for i in range(owners)]
+
+
+def measure(records, compact):
+    """
+    Build a registry from records with one representation. Return bytes per owner
+    (tree nodes + pokedexes; the shared species table is loaded beforehand and not counted).
+    """
+    ex7.clear_registry()
+    ex7.compactOwners = compact
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [ex7.new_owner_node(owner_name, pokemons) for owner_name, pokemons in records]
+    ex7.ownerRoot = ex7.build_balanced_tree(nodes)
+    del nodes
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    ex7.clear_registry()
+    return used / len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare bytes per owner of the two owner node layouts.")
+    parser.add_argument("--owners", type=int, default=100000)
+    parser.add_argument("--max-dex", type=int, default=10, help="pokedex sizes are uniform in 1..max-dex")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    records = make_records(args.owners, args.max_dex, args.seed)
+    dict_bytes = measure(records, compact=False)
+    compact_bytes = measure(records, compact=True)
+    print(json.dumps({"owners": args.owners, "max_dex": args.max_dex,
+                      "dict_bytes_per_owner": round(dict_bytes, 1),
+                      "compact_bytes_per_owner": round(compact_bytes, 1),
+                      "ratio": round(dict_bytes / compact_bytes, 2)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# bench_server.py
+#
+# Load generator for pokedex_server: many concurrent sessions sending mixed read/write
+# traffic, reporting per-op latency percentiles and throughput.
+#   python bench_server.py --clients 32 --requests 500 --reads 0.9
+#   python bench_server.py --port 7007 --clients 64        (against a running server)
+# Without --port/--unix a server is started in this process on a free port.
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+import ex7
+import pokedex_server
+
+FILTERS = (("type", "water"), ("evolvable", ""), ("attack", 80), ("hp", 70), ("prefix", "s"))
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def make_request(rng, client, owners, reads):
+    """
+    One random request line (JSON). Reads are owner queries, cross-owner queries and
+    the owner listings; writes are add/release/evolve on the client's own owners and
+    the occasional create/delete.
+    """
+    data = ex7.get_hoenn_data()
+    if rng.random() < reads:
+        roll = rng.random()
+        if roll < 0.6:
+            command = {"op": "query", "owner": rng.choice(owners), "filter": "all"}
+        elif roll < 0.85:
+            kind, value = rng.choice(FILTERS)
+            command = {"op": "query", "owner": rng.choice(owners), "filter": kind, "value": value}
+        elif roll < 0.95:
+            command = {"op": "by_count", "reverse": True}
+        else:
+            command = {"op": "owners", "order": rng.choice(tuple(ex7.TRAVERSALS))}
+    else:
+        roll = rng.random()
+        owner = rng.choice(owners)
+        if roll < 0.5:
+            command = {"op": "add", "owner": owner, "id": rng.choice(data)['ID']}
+        elif roll < 0.75:
+            command = {"op": "release", "owner": owner, "name": rng.choice(data)['Name']}
+        elif roll < 0.9:
+            command = {"op": "evolve", "owner": owner, "name": rng.choice(data)['Name']}
+        else:
+            scratch = f"client{client:03d}-scratch"
+            command = {"op": rng.choice(("create", "delete")), "owner": scratch, "starter": 1}
+    return command
+
+
+async def run_client(connect, client, requests, owners, reads, seed, latencies):
+    rng = random.Random(seed * 1000 + client)
+    reader, writer = await connect()
+    errors = 0
+    try:
+        for _ in range(requests):
+            command = make_request(rng, client, owners, reads)
+            start = time.perf_counter()
+            writer.write((json.dumps(command) + "\n").encode('utf-8'))
+            await writer.drain()
+            reply = json.loads(await reader.readline())
+            latencies.setdefault(command["op"], []).append(time.perf_counter() - start)
+            if not reply["ok"]:
+                errors += 1
+    finally:
+        writer.close()
+    return errors
+
+
+async def seed_owners(connect, owners, seed):
+    """
+    Create the shared owners the clients work on, over one connection.
+    """
+    rng = random.Random(seed)
+    data = ex7.get_hoenn_data()
+    reader, writer = await connect()
+    for owner in owners:
+        ids = [p['ID'] for p in rng.sample(data, rng.randint(1, 8))]
+        writer.write((json.dumps({"op": "create", "owner": owner, "ids": ids}) + "\n").encode('utf-8'))
+        await writer.drain()
+        await reader.readline()
+    writer.close()
+
+
+def summarize(latencies, seconds, errors):
+    """
+    {op: {count, p50_ms, p90_ms, p99_ms, max_ms}} plus overall throughput.
+    """
+    report = {"ops": {}}
+    everything = []
+    for op, values in sorted(latencies.items()):
+        values.sort()
+        everything.extend(values)
+        report["ops"][op] = {"count": len(values),
+                             **{f"p{int(f * 100)}_ms": round(percentile(values, f) * 1000, 3)
+                                for f in (0.5, 0.9, 0.99)},
+                             "max_ms": round(values[-1] * 1000, 3)}
+    everything.sort()
+    report["all"] = {"count": len(everything),
+                     **{f"p{int(f * 100)}_ms": round(percentile(everything, f) * 1000, 3)
+                        for f in (0.5, 0.9, 0.99)},
+                     "max_ms": round(everything[-1] * 1000, 3) if everything else None}
+    report["seconds"] = round(seconds, 3)
+    report["requests_per_sec"] = round(len(everything) / seconds, 1) if seconds else None
+    report["errors"] = errors  # expected failures, e.g. releasing a Pokemon the owner doesn't have
+    return report
+
+
+async def run_load(args):
+    server = None
+    if args.unix:
+        connect = lambda: asyncio.open_unix_connection(args.unix)
+    elif args.port:
+        connect = lambda: asyncio.open_connection(args.host, args.port)
+    else:
+        ex7.get_species_index()
+        server = pokedex_server.PokedexServer(args.workers)
+        await server.start(args.host, 0)
+        port = server.server.sockets[0].getsockname()[1]
+        connect = lambda: asyncio.open_connection(args.host, port)
+
+    owners = [f"owner{i:05d}" for i in range(args.owners)]
+    await seed_owners(connect, owners, args.seed)
+    latencies = {}
+    start = time.perf_counter()
+    errors = await asyncio.gather(*(run_client(connect, client, args.requests, owners,
+                                               args.reads, args.seed, latencies)
+                                    for client in range(args.clients)))
+    seconds = time.perf_counter() - start
+    if server is not None:
+        await server.close()
+    return summarize(latencies, seconds, sum(errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed read/write load against the Pokedex server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="an already running server (default: start one here)")
+    parser.add_argument("--unix", metavar="PATH", help="an already running server on a Unix socket")
+    parser.add_argument("--workers", type=int, default=8, help="worker threads of the in-process server")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500, help="requests per client")
+    parser.add_argument("--owners", type=int, default=1000, help="owners created before the run")
+    parser.add_argument("--reads", type=float, default=0.9, help="fraction of requests that are reads")
+    parser.add_argument("--seed", type=int, default=2024)
+    args = parser.parse_args()
+    print(f"{args.clients} clients x {args.requests} requests, {args.reads:.0%} reads ...", file=sys.stderr)
+    print(json.dumps(asyncio.run(run_load(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,11 @@
-import csv
+import os
+import sys
+import struct
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import deque
 
 #######################
 #Name: Shaked Levy
@@ -7,6 +14,26 @@ import csv
 
 # Global BST root
 ownerRoot = None
+# Normalized owner name (owner_key) -> node, for O(1) exact lookups in the registry
+ownerIndex = {}
+# Secondary AVL ordered by (#pokedex size, owner name), kept in sync with ownerRoot
+ownerCountRoot = None
+# Species ID -> set of owner_keys holding it, kept in sync with ownerRoot (see 5a)
+speciesOwners = {}
+# Called as hook(op, owner_name, ids) after every registry change (see pokedex_storage.py)
+mutationHooks = []
+# New owners are OwnerNode objects with array('H') pokedexes instead of dicts (see 2d)
+compactOwners = False
+# Counters for the owner tree while instrumentation is on, else None (see 2e)
+treeStats = None
+# Persistent copy of ownerRoot kept up to date while snapshotTracking is on (see 2f)
+frozenRoot = None
+snapshotTracking = False
+# Formatted text per species ID, filled by pokemon_line (species rows never change)
+renderedPokemon = {}
+# Species table and its indexes, loaded on first use (see get_hoenn_data)
+hoennData = None
+speciesIndex = None
 
 ########################
 # 0) Read from CSV -> HOENN_DATA
@@ -20,6 +47,7 @@ def read_hoenn_csv(filename):
           "Attack": int, "Can Evolve": "TRUE"/"FALSE" },
         ... ]
     """
+    import csv  # only needed when the snapshot misses => not paid on every import
     data_list = []
     with open(filename, mode='r', encoding='utf-8') as f:
         reader = csv.reader(f, delimiter=',')  # Use comma as the delimiter
@@ -45,7 +73,210 @@ def read_hoenn_csv(filename):
     return data_list
 
 
-HOENN_DATA = read_hoenn_csv("hoenn_pokedex.csv")
+HOENN_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hoenn_pokedex.csv")
+HOENN_SNAPSHOT = os.path.splitext(HOENN_CSV)[0] + ".bin"
+
+# Snapshot layout (little endian):
+#   header: magic, version, source CSV size, source CSV mtime_ns, #rows, crc32 of the rest
+#   rows:   ID, HP, Attack, Can Evolve (0/1) per species
+#   then:   "Name\0Type\0Name\0Type..." as UTF-8
+SNAPSHOT_MAGIC = b"HOEN"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sHqqII")
+SNAPSHOT_ROW = struct.Struct("<iiiB")
+
+
+def write_hoenn_snapshot(data, snapshot_path, csv_stat):
+    """
+    Pack the species table into snapshot_path, tagged with the CSV's size and mtime.
+    Written to a temp file first so a half-written snapshot is never picked up; the temp
+    name is unique (pid-suffixed), so two processes building the snapshot at once can't mix
+    their writes.
+    """
+    rows = b"".join(SNAPSHOT_ROW.pack(p['ID'], p['HP'], p['Attack'], p['Can Evolve'] == 'TRUE')
+                    for p in data)
+    strings = "\0".join(f"{p['Name']}\0{p['Type']}" for p in data).encode('utf-8')
+    payload = rows + strings
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, csv_stat.st_size,
+                                  csv_stat.st_mtime_ns, len(data), zlib.crc32(payload))
+    temp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    try:
+        fd = os.open(temp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0), 0o644)
+    except FileExistsError:
+        return  # another thread of this process is writing the same snapshot
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header + payload)
+        os.replace(temp_path, snapshot_path)
+    except BaseException:
+        #don't leave the temp file behind
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_hoenn_snapshot(snapshot_path, csv_stat):
+    """
+    Unpack a snapshot written by write_hoenn_snapshot. Return the species list, or None if
+    the file is missing, damaged, or was built from a different version of the CSV.
+    """
+    try:
+        with open(snapshot_path, 'rb') as f:
+            blob = f.read()
+    except OSError:
+        return None
+    if len(blob) < SNAPSHOT_HEADER.size:
+        return None
+    magic, version, csv_size, csv_mtime, count, crc = SNAPSHOT_HEADER.unpack_from(blob)
+    if (magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION
+            or csv_size != csv_stat.st_size or csv_mtime != csv_stat.st_mtime_ns):
+        return None
+    payload = memoryview(blob)[SNAPSHOT_HEADER.size:]
+    rows_size = count * SNAPSHOT_ROW.size
+    if len(payload) < rows_size or zlib.crc32(payload) != crc:
+        return None
+    strings = bytes(payload[rows_size:]).decode('utf-8').split("\0") if count else []
+    data_list = []
+    for i, (poke_id, hp, attack, can_evolve) in enumerate(SNAPSHOT_ROW.iter_unpack(payload[:rows_size])):
+        data_list.append({
+            "ID": poke_id,
+            "Name": strings[2 * i],
+            "Type": strings[2 * i + 1],
+            "HP": hp,
+            "Attack": attack,
+            "Can Evolve": "TRUE" if can_evolve else "FALSE"
+        })
+    return data_list
+
+
+def load_hoenn_data(csv_path=HOENN_CSV, snapshot_path=HOENN_SNAPSHOT):
+    """
+    Load the species table from the snapshot if it matches the CSV, otherwise parse the
+    CSV and (re)write the snapshot for next time.
+    """
+    csv_stat = os.stat(csv_path)
+    data = read_hoenn_snapshot(snapshot_path, csv_stat)
+    if data is None:
+        data = read_hoenn_csv(csv_path)
+        try:
+            write_hoenn_snapshot(data, snapshot_path, csv_stat)
+        except OSError:
+            pass  # read-only checkout => just parse the CSV every time
+    return data
+
+
+def get_hoenn_data():
+    """
+    The species table (HOENN_DATA), loaded on first use.
+    """
+    global hoennData
+    if hoennData is None:
+        hoennData = load_hoenn_data()
+    return hoennData
+
+
+def __getattr__(name):
+    # Keep `ex7.HOENN_DATA` / `ex7.SPECIES_INDEX` working for other modules without
+    # loading anything at import time
+    if name == "HOENN_DATA":
+        return get_hoenn_data()
+    if name == "SPECIES_INDEX":
+        return get_species_index()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+########################
+# 0a) Species indexes (built once per species table)
+########################
+
+def build_species_index(data):
+    """
+    Precompute lookup structures over the species table:
+      "type"   -> { lowercase type: [IDs] }
+      "attack" / "hp" -> (sorted stat values, IDs in the same order), for bisect
+      "name"   -> (sorted lowercase names, IDs in the same order), for prefix bisect
+      "evolvable" -> [IDs that can evolve]
+      "evolution" -> { ID: ID it evolves into }
+    """
+    by_type = {}
+    for p in data:
+        by_type.setdefault(p['Type'].lower(), []).append(p['ID'])
+    index = {"type": by_type,
+             "evolvable": [p['ID'] for p in data if p['Can Evolve'] == 'TRUE'],
+             "all": [p['ID'] for p in data]}
+    for kind, field in (("attack", "Attack"), ("hp", "HP")):
+        pairs = sorted((p[field], p['ID']) for p in data)
+        index[kind] = ([v for v, _ in pairs], [i for _, i in pairs])
+    pairs = sorted((p['Name'].lower(), p['ID']) for p in data)
+    index["name"] = ([v for v, _ in pairs], [i for _, i in pairs])
+    #the table lists every evolution line in order => an evolvable species evolves
+    #into the row right after it (nothing if it's the last row)
+    index["evolution"] = {p['ID']: q['ID'] for p, q in zip(data, data[1:]) if p['Can Evolve'] == 'TRUE'}
+    return index
+
+
+def get_species_index():
+    """
+    The species indexes (SPECIES_INDEX), built on first use.
+    """
+    global speciesIndex
+    if speciesIndex is None:
+        speciesIndex = build_species_index(get_hoenn_data())
+    return speciesIndex
+
+
+def evolution_target(poke_id):
+    """
+    ID of the species poke_id evolves into, or None if it can't evolve.
+    """
+    return get_species_index()["evolution"].get(poke_id)
+
+
+def query_species_by_type(type_name):
+    """
+    IDs of every species of this type (any case).
+    """
+    return list(get_species_index()["type"].get(type_name.lower(), ()))
+
+
+def query_species_stat_at_least(stat, threshold):
+    """
+    IDs of every species with stat ("attack" or "hp") >= threshold, weakest first. O(log n + k).
+    """
+    values, ids = get_species_index()[stat]
+    return ids[bisect_left(values, threshold):]
+
+
+def query_species_name_prefix(prefix):
+    """
+    IDs of every species whose name starts with prefix (any case), by name. O(log n + k).
+    """
+    prefix = prefix.lower()
+    names, ids = get_species_index()["name"]
+    result = []
+    i = bisect_left(names, prefix)
+    while i < len(names) and names[i].startswith(prefix):
+        result.append(ids[i])
+        i += 1
+    return result
+
+
+def query_species(kind, value=None):
+    """
+    IDs of the species matching one display filter (see FILTER_KINDS).
+    """
+    if kind == "type":
+        return query_species_by_type(value)
+    elif kind == "evolvable":
+        return list(get_species_index()["evolvable"])
+    elif kind in ("attack", "hp"):
+        return query_species_stat_at_least(kind, value)
+    elif kind == "prefix":
+        return query_species_name_prefix(value)
+    elif kind == "all":
+        return list(get_species_index()["all"])
+    raise ValueError(f"Unknown filter kind '{kind}'.")
 
 ########################
 # 1) Helper Functions
@@ -63,9 +294,10 @@ def get_poke_dict_by_id(poke_id):
     """
     Return a copy of the Pokemon dict from HOENN_DATA by ID, or None if not found.
     """
-    if poke_id < 1 or poke_id > len(HOENN_DATA):
+    data = get_hoenn_data()
+    if poke_id < 1 or poke_id > len(data):
         return None
-    new = HOENN_DATA[poke_id-1]
+    new = data[poke_id-1]
     if new is None:
         return None
     else:
@@ -76,52 +308,218 @@ def get_poke_dict_by_id(poke_id):
 # 2) BST (By Owner Name)
 ########################
 
+def owner_key(owner_name):
+    """
+    Normalized (casefolded) owner name: what the tree is ordered by and ownerIndex is keyed on.
+    """
+    if treeStats is not None:
+        treeStats['lower_calls'] += 1
+    key = owner_name.casefold()
+    #most names are already lowercase => keep one string instead of an equal copy
+    return owner_name if key == owner_name else key
+
+
+# Starter menu choice -> Pokemon ID (Treecko, Torchic, Mudkip)
+STARTER_IDS = {1: 1, 2: 4, 3: 7}
+
+
+def new_owner_node(owner_name, pokemons=()):
+    """
+    Create and return a BST node dict with keys: 'owner', 'key', 'pokedex', 'pokedex_names',
+    'left', 'right', 'height'. 'key' is owner_key(owner), 'pokedex' maps ID -> Pokemon in
+    the order they were added, 'pokedex_names' maps lowercase name -> ID.
+    If compactOwners is set, return the equivalent (smaller) OwnerNode instead.
+    """
+    if compactOwners:
+        return OwnerNode(owner_name, [p['ID'] for p in pokemons])
+    return {"owner": owner_name,
+            "key": owner_key(owner_name),
+            "pokedex": {p['ID']: p for p in pokemons},
+            "pokedex_names": {p['Name'].lower(): p['ID'] for p in pokemons},
+            "left": None, "right": None, "height": 1}
+
+
+def add_owner(owner_node):
+    """
+    Insert a new owner node into the registry (ownerRoot and its indexes).
+    Return False if an owner with that name already exists.
+    """
+    global ownerRoot
+    if owner_node['key'] in ownerIndex:
+        return False
+    ownerRoot = insert_owner_bst(ownerRoot, owner_node)
+    ownerIndex[owner_node['key']] = owner_node
+    index_owner_count(owner_node)
+    index_owner_species(owner_node)
+    notify_mutation("create", owner_node['owner'], list(owner_node['pokedex']))
+    return True
+
+
 def create_owner_node(owner_name, first_pokemon):
     """
-    Create and return a BST node dict with keys: 'owner', 'pokedex', 'left', 'right'.
+    Create a new owner with a starter (1, 2 or 3) and add it to the registry.
+    Return the new node, or None if the owner already exists.
     """
-    if first_pokemon == 1:
-        first_pokemon = HOENN_DATA[0]
-    elif first_pokemon == 2:
-        first_pokemon = HOENN_DATA[3]
-    elif first_pokemon == 3:
-        first_pokemon = HOENN_DATA[6]
-    owner = {"owner": owner_name, "pokedex": [first_pokemon], "left": None, "right": None}
-    insert_owner_bst(ownerRoot, owner)
+    if first_pokemon in STARTER_IDS:
+        first_pokemon = get_poke_dict_by_id(STARTER_IDS[first_pokemon])
+    owner = new_owner_node(owner_name, [first_pokemon])
+    if not add_owner(owner):
+        print(f"Owner '{owner_name.lower()}' already exists. No new Pokedex created.")
+        return None
     print(f"New Pokedex created for {owner_name} with starter {first_pokemon['Name']}.")
+    return owner
+
+
+def find_owner(owner_name):
+    """
+    Exact (case-insensitive) lookup of a registry owner in O(1) through ownerIndex.
+    Return the node or None.
+    """
+    return ownerIndex.get(owner_key(owner_name))
+
+
+def notify_mutation(op, owner_name, ids=()):
+    """
+    Tell every registered mutation hook about a change: op is "create", "delete",
+    "add", "release" or "evolve", ids the Pokemon IDs involved ("evolve": old, new
+    pairs, each old one released and its evolution added unless already there).
+    """
+    for hook in mutationHooks:
+        hook(op, owner_name, ids)
+
+
+########################
+# 2a) AVL balancing helpers
+########################
 
+def node_height(node):
+    """
+    Height of a subtree (0 for an empty one).
+    """
+    if node is None:
+        return 0
+    return node['height']
+
+
+def update_height(node):
+    node['height'] = 1 + max(node_height(node['left']), node_height(node['right']))
+
+
+def balance_factor(node):
+    return node_height(node['left']) - node_height(node['right'])
+
+
+def rotate_right(root, counted=True):
+    """
+    Rotate the subtree right around root. Return the new subtree root.
+    counted=False keeps it out of treeStats (count index work, not owner tree work).
+    """
+    if treeStats is not None and counted:
+        treeStats['rotations'] += 1
+    new_root = root['left']
+    root['left'] = new_root['right']
+    new_root['right'] = root
+    update_height(root)
+    update_height(new_root)
+    return new_root
+
+
+def rotate_left(root, counted=True):
+    """
+    Rotate the subtree left around root. Return the new subtree root.
+    counted=False keeps it out of treeStats (count index work, not owner tree work).
+    """
+    if treeStats is not None and counted:
+        treeStats['rotations'] += 1
+    new_root = root['right']
+    root['right'] = new_root['left']
+    new_root['left'] = root
+    update_height(root)
+    update_height(new_root)
+    return new_root
+
+
+def rebalance(root, counted=True):
+    """
+    Fix the height of root and rotate if it leans more than one level. Return the new subtree root.
+    counted=False: rotations are not counted in treeStats (used by the count index).
+    """
+    update_height(root)
+    balance = balance_factor(root)
+    if balance > 1:
+        #left-right case => turn it into left-left first
+        if balance_factor(root['left']) < 0:
+            root['left'] = rotate_left(root['left'], counted)
+        return rotate_right(root, counted)
+    if balance < -1:
+        #right-left case => turn it into right-right first
+        if balance_factor(root['right']) > 0:
+            root['right'] = rotate_right(root['right'], counted)
+        return rotate_left(root, counted)
+    return root
+
+
+def is_balanced_owner_bst(root):
+    """
+    Check the AVL invariants of the owner tree: names in order, stored heights correct
+    and no node leaning more than one level. Return True/False.
+    """
+    def checked_height(node, low, high):
+        #returns the real height, or -1 if something is broken below node
+        if node is None:
+            return 0
+        key = node['key']
+        if (low is not None and key <= low) or (high is not None and key >= high):
+            return -1
+        left = checked_height(node['left'], low, key)
+        right = checked_height(node['right'], key, high)
+        if left < 0 or right < 0 or abs(left - right) > 1:
+            return -1
+        if node['height'] != 1 + max(left, right):
+            return -1
+        return node['height']
+
+    return checked_height(root, None, None) >= 0
+
+
+########################
+# 2b) BST operations
+########################
 
 def insert_owner_bst(root, new_node):
     """
-    Insert a new BST node by owner_name (alphabetically). Return updated root.
+    Insert a new BST node by owner_name (alphabetically), keeping the tree balanced.
+    Return updated root.
     """
-    global ownerRoot
-    if ownerRoot is None:
-        ownerRoot = new_node
-        return ownerRoot
     if root is None:
-        root = new_node
-        return root
-    if new_node['owner'].lower() < root['owner'].lower():
+        new_node['height'] = 1
+        return new_node
+    if treeStats is not None:
+        count_visit("insert")
+    if new_node['key'] < root['key']:
         root['left'] = insert_owner_bst(root['left'], new_node)
-    elif new_node['owner'].lower() > root['owner'].lower():
+    elif new_node['key'] > root['key']:
         root['right'] = insert_owner_bst(root['right'], new_node)
     else:
         print(f"Owner '{new_node['owner'].lower()}' already exists. No new Pokedex created.")
-    return root
+        return root
+    return rebalance(root)
 
 def find_owner_bst(root, owner_name):
     """
     Locate a BST node by owner_name. Return that node or None if missing.
     """
-    if root is None:
-        return None
-    if owner_name.lower() == root["owner"].lower():
-        return root
-    elif owner_name.lower() < root["owner"].lower():
-        return find_owner_bst(root["left"], owner_name)
-    else:
-        return find_owner_bst(root["right"], owner_name)
+    key = owner_key(owner_name)
+    while root is not None:
+        if treeStats is not None:
+            count_visit("find")
+        if key == root["key"]:
+            return root
+        elif key < root["key"]:
+            root = root["left"]
+        else:
+            root = root["right"]
+    return None
 
 def get_successor(current):
     if current is None:
@@ -130,144 +528,1010 @@ def get_successor(current):
         current = current['left']
     return current
 
+def remove_min_owner(root, counted=True):
+    """
+    Unlink the leftmost node of this subtree. Return updated root.
+    """
+    if root['left'] is None:
+        return root['right']
+    root['left'] = remove_min_owner(root['left'], counted)
+    return rebalance(root, counted)
+
 def delete_owner_bst(root, owner_name):
     """
     Removes a node from the BST by owner_name. Return updated root.
     """
-    global ownerRoot
+    if root is ownerRoot:
+        node = ownerIndex.get(owner_key(owner_name))
+    else:
+        node = find_owner_bst(root, owner_name)
+    if node is None:
+        return root
+    owner_name = node['owner']
+    unindex_owner_count(node)
+    unindex_owner_species(node)
+    if ownerIndex.get(node['key']) is node:
+        del ownerIndex[node['key']]
+    root = delete_owner_node(root, node['key'])
+    notify_mutation("delete", owner_name)
+    return root
+
+def delete_owner_node(root, key):
+    """
+    Unlink the node with this owner_key from the BST, keeping the tree balanced.
+    Return updated root.
+    """
     if root is None:
-        return
+        return None
+    if treeStats is not None:
+        count_visit("delete")
     #find node
-    #check for leaf
-    if owner_name < root['owner']:
-        root['left'] = delete_owner_bst(root['left'], owner_name)
-    elif owner_name > root['owner']:
-        root['right'] = delete_owner_bst(root['right'], owner_name)
+    if key < root['key']:
+        root['left'] = delete_owner_node(root['left'], key)
+    elif key > root['key']:
+        root['right'] = delete_owner_node(root['right'], key)
     else:
         # found node to delete
-        if root['left'] is None and root['right'] is None:
-            if root == ownerRoot:#update ownerRoot
-                ownerRoot = None
-            return None
-
-        #has only right child
+        #has at most one child => the child takes its place
         if root['left'] is None:
-            if root == ownerRoot:#update ownerRoot
-                ownerRoot = root['right']
             return root['right']
-
-        #has only left child
         if root['right'] is None:
-            if root == ownerRoot:#update ownerRoot
-                ownerRoot = root['left']
             return root['left']
+        #has two children
+        successor = get_successor(root['right'])
+        root['owner'] = successor['owner']
+        root['key'] = successor['key']
+        root['pokedex'] = successor['pokedex']
+        root['pokedex_names'] = successor['pokedex_names']
+        #root now holds the successor's owner => point the name index at it
+        #(speciesOwners holds keys, not nodes, so it is already right)
+        if ownerIndex.get(successor['key']) is successor:
+            ownerIndex[successor['key']] = root
+        #unlink successor
+        root['right'] = remove_min_owner(root['right'])
+
+    return rebalance(root)
+
+
+
+########################
+# 2c) Bulk build
+########################
+
+def build_balanced_tree(nodes, counted=True):
+    """
+    Link an already sorted list of nodes into a perfectly balanced tree in O(n),
+    setting 'left', 'right' and 'height' on each. Return the root.
+    counted=False keeps the rebuild out of treeStats (the count index isn't the owner tree).
+    """
+    if treeStats is not None and counted:
+        treeStats['rebuilds'] += 1
+
+    def build(lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        node = nodes[mid]
+        node['left'] = build(lo, mid)
+        node['right'] = build(mid + 1, hi)
+        update_height(node)
+        return node
+
+    return build(0, len(nodes))
+
+
+def rebuild_count_index():
+    """
+    Rebuild ownerCountRoot from scratch out of the owners currently in ownerRoot, in O(n):
+    owners come out of ownerRoot already in name order, so bucketing them by pokedex size
+    gives the (size, name) order without a sort.
+    """
+    global ownerCountRoot
+    buckets = []
+    for node in iter_in_order(ownerRoot):
+        size = len(node['pokedex'])
+        while len(buckets) <= size:
+            buckets.append([])
+        buckets[size].append({"key": (size, node['key']), "owner": node['owner'],
+                              "left": None, "right": None, "height": 1})
+    ownerCountRoot = build_balanced_tree([entry for bucket in buckets for entry in bucket], counted=False)
+
+
+def bulk_load_owners(records, presorted=False):
+    """
+    Add many owners at once. records is an iterable of (owner_name, pokedex) where pokedex
+    is a list of Pokemon IDs or dicts. Unless presorted, records are sorted by name first.
+    They are merged with the owners already in ownerRoot and the whole tree is rebuilt
+    perfectly balanced in O(n), instead of one insert_owner_bst walk per owner.
+    Duplicate names are rejected like insert_owner_bst does. Return #owners added.
+    Raise ValueError (before changing anything) if a record has an unknown Pokemon ID.
+    """
+    global ownerRoot
+    new_nodes = []
+    for owner_name, pokedex in records:
+        pokemons = [get_poke_dict_by_id(p) if isinstance(p, int) else p for p in pokedex]
+        if None in pokemons:
+            #e.g. a snapshot written against a bigger species table
+            bad = pokedex[pokemons.index(None)]
+            raise ValueError(f"Owner '{owner_name}' has unknown Pokemon ID {bad}.")
+        new_nodes.append(new_owner_node(owner_name, pokemons))
+    if not presorted:
+        new_nodes.sort(key=lambda node: node['key'])
+
+    #linear merge of the existing (sorted) owners with the new ones
+    merged = []
+    added = []
+    existing = list(iter_in_order(ownerRoot))
+    i = 0
+    for node in new_nodes:
+        key = node['key']
+        while i < len(existing) and existing[i]['key'] < key:
+            merged.append(existing[i])
+            i += 1
+        if (merged and merged[-1]['key'] == key) or (i < len(existing) and existing[i]['key'] == key):
+            print(f"Owner '{node['owner'].lower()}' already exists. No new Pokedex created.")
+            continue
+        if merged and merged[-1]['key'] > key:
+            raise ValueError("bulk_load_owners(presorted=True) got records out of name order.")
+        merged.append(node)
+        added.append(node)
+    merged.extend(existing[i:])
+
+    ownerRoot = build_balanced_tree(merged)
+    rebuild_count_index()
+    for node in added:
+        ownerIndex[node['key']] = node
+        index_owner_species(node)
+    for node in added:
+        notify_mutation("create", node['owner'], list(node['pokedex']))
+    return len(added)
+
+
+def rebuild_owner_index():
+    """
+    Rebuild ownerIndex and speciesOwners from scratch out of the owners currently in ownerRoot.
+    """
+    global ownerIndex, speciesOwners
+    ownerIndex = {node['key']: node for node in iter_in_order(ownerRoot)}
+    speciesOwners = build_species_owners(ownerRoot)
+
+
+def clear_registry():
+    """
+    Forget every owner: empty ownerRoot and its indexes.
+    """
+    global ownerRoot, ownerCountRoot, ownerIndex, speciesOwners, frozenRoot
+    ownerRoot = None
+    ownerCountRoot = None
+    ownerIndex = {}
+    speciesOwners = {}
+    frozenRoot = None
+
+
+def rebalance_owner_tree():
+    """
+    Rebuild the current tree perfectly balanced in O(n), through the same path as bulk_load_owners.
+    """
+    global ownerRoot
+    ownerRoot = build_balanced_tree(list(iter_in_order(ownerRoot)))
+
+
+########################
+# 2d) Compact owner nodes
+########################
+
+class CompactPokedex:
+    """
+    Dict-shaped view (ID -> Pokemon) over an owner's array('H') of IDs, so code written
+    for dict nodes works unchanged. Pokemon dicts are only looked up in HOENN_DATA when
+    they are read. Membership and removal scan the array, which stays cheap for
+    pokedexes of a few hundred entries at most.
+    """
+    __slots__ = ('ids',)
+
+    def __init__(self, ids):
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __contains__(self, poke_id):
+        return poke_id in self.ids
+
+    def __getitem__(self, poke_id):
+        if poke_id not in self.ids:
+            raise KeyError(poke_id)
+        return get_poke_dict_by_id(poke_id)
+
+    def __setitem__(self, poke_id, pokemon):
+        if poke_id not in self.ids:
+            self.ids.append(poke_id)
+
+    def __delitem__(self, poke_id):
+        try:
+            self.ids.remove(poke_id)
+        except ValueError:
+            raise KeyError(poke_id)
+
+    def get(self, poke_id, default=None):
+        if poke_id not in self.ids:
+            return default
+        return get_poke_dict_by_id(poke_id)
+
+    def keys(self):
+        return iter(self.ids)
+
+    def values(self):
+        return [get_poke_dict_by_id(poke_id) for poke_id in self.ids]
+
+    def items(self):
+        return [(poke_id, get_poke_dict_by_id(poke_id)) for poke_id in self.ids]
+
+
+class CompactPokedexNames:
+    """
+    Dict-shaped view (lowercase name -> ID) over the same array. Nothing is stored:
+    names are derived from the IDs, so writes are ignored.
+    """
+    __slots__ = ('ids',)
+
+    def __init__(self, ids):
+        self.ids = ids
+
+    def get(self, name, default=None):
+        data = get_hoenn_data()
+        for poke_id in self.ids:
+            if data[poke_id - 1]['Name'].lower() == name:
+                return poke_id
+        return default
+
+    def __setitem__(self, name, poke_id):
+        pass
+
+    def __delitem__(self, name):
+        pass
+
+
+class OwnerNode:
+    """
+    Slotted replacement for the owner node dict: the pokedex is an array('H') of IDs.
+    node['owner'], node['left'], node['pokedex'] ... keep working like on the dict.
+    """
+    __slots__ = ('owner', 'key', 'ids', 'left', 'right', 'height')
+
+    def __init__(self, owner_name, ids=()):
+        self.owner = owner_name
+        self.key = owner_key(owner_name)
+        self.ids = array('H')
+        for poke_id in ids:
+            if poke_id not in self.ids:
+                self.ids.append(poke_id)
+        self.left = None
+        self.right = None
+        self.height = 1
+
+    def __getitem__(self, key):
+        if key == 'pokedex':
+            return CompactPokedex(self.ids)
+        if key == 'pokedex_names':
+            return CompactPokedexNames(self.ids)
+        if key in OwnerNode.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'pokedex':
+            #successor copy in delete_owner_node, or a plain dict/list of IDs
+            self.ids = value.ids if isinstance(value, CompactPokedex) else array('H', value)
+        elif key == 'pokedex_names':
+            pass
+        elif key in OwnerNode.__slots__:
+            setattr(self, key, value)
         else:
-            #has two children
-            successor = get_successor(root['right'])
-            root['owner'] = successor['owner']
-            root['pokedex'] = successor['pokedex']
-            #delete successor
-            root['right'] = delete_owner_bst(root['right'], successor['owner'])
+            raise KeyError(key)
 
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
 
-    return root
 
+def convert_owner_tree(compact=True):
+    """
+    Switch every owner in the registry (and new owners from now on) to OwnerNode
+    (compact=True) or back to plain dicts, then relink the tree in O(n).
+    """
+    global ownerRoot, compactOwners
+    compactOwners = compact
+    nodes = [new_owner_node(node['owner'], node['pokedex'].values()) for node in iter_in_order(ownerRoot)]
+    ownerRoot = build_balanced_tree(nodes)
+    rebuild_owner_index()
 
 
 ########################
-# 3) BST Traversals
+# 2e) Instrumentation
 ########################
 
-def bfs_traversal(root):
+# Public tree functions that get wrapped while instrumentation is on: name -> (op, recursive)
+INSTRUMENTED_FUNCTIONS = {"find_owner_bst": ("find", False),
+                          "insert_owner_bst": ("insert", True),
+                          "delete_owner_bst": ("delete", False),
+                          "delete_owner_node": (None, True)}
+# The plain functions, while the wrapped ones are installed
+originalTreeFunctions = {}
+
+
+def new_tree_stats():
+    ops = {op: {"calls": 0, "comparisons": 0, "max_comparisons": 0, "seconds": 0.0}
+           for op in ("find", "insert", "delete")}
+    return {"ops": ops, "lower_calls": 0, "rotations": 0, "rebuilds": 0,
+            "max_recursion_depth": 0, "recursion": 0, "current": None}
+
+
+def count_visit(op):
+    """
+    Count one node visited by a find/insert/delete walk. Only called while
+    instrumentation is on.
+    """
+    if treeStats['current'] is not None:
+        op = treeStats['current']  # e.g. the walk inside a delete counts for the delete
+    treeStats['ops'][op]['comparisons'] += 1
+
+
+def instrumented(func, op, recursive):
+    def wrapper(*args, **kwargs):
+        stats = treeStats
+        if stats is None:
+            return func(*args, **kwargs)
+        if recursive:
+            stats['recursion'] += 1
+            stats['max_recursion_depth'] = max(stats['max_recursion_depth'], stats['recursion'])
+        try:
+            if op is None or stats['current'] is not None:
+                return func(*args, **kwargs)  # inner call, the outer op is timing it
+            entry = stats['ops'][op]
+            before = entry['comparisons']
+            stats['current'] = op
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                entry['seconds'] += time.perf_counter() - start
+                entry['calls'] += 1
+                entry['max_comparisons'] = max(entry['max_comparisons'], entry['comparisons'] - before)
+                stats['current'] = None
+        finally:
+            if recursive:
+                stats['recursion'] -= 1
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+
+def enable_tree_stats():
+    """
+    Start counting comparisons, name normalizations (owner_key), recursion depth, rotations, rebuilds and
+    time per find/insert/delete. When off, the tree functions run unwrapped.
+    """
+    global treeStats
+    treeStats = new_tree_stats()
+    if not originalTreeFunctions:
+        for name, (op, recursive) in INSTRUMENTED_FUNCTIONS.items():
+            originalTreeFunctions[name] = globals()[name]
+            globals()[name] = instrumented(originalTreeFunctions[name], op, recursive)
+
+
+def disable_tree_stats():
+    """
+    Stop instrumentation and return the counters collected so far.
+    """
+    global treeStats
+    stats = treeStats
+    treeStats = None
+    for name, func in originalTreeFunctions.items():
+        globals()[name] = func
+    originalTreeFunctions.clear()
+    return stats
+
+
+def tree_stats(root=None):
+    """
+    Shape of the owner tree (ownerRoot by default): height, #nodes, average and max depth
+    (root = depth 0) and a histogram of pokedex sizes {size: #owners}.
+    """
+    if root is None:
+        root = ownerRoot
+    count = depth_sum = max_depth = 0
+    histogram = {}
+    for depth, node in bfs_traversal(root, with_depth=True):
+        count += 1
+        depth_sum += depth
+        max_depth = depth
+        size = len(node['pokedex'])
+        histogram[size] = histogram.get(size, 0) + 1
+    return {"height": node_height(root), "nodes": count,
+            "avg_depth": depth_sum / count if count else 0.0,
+            "max_depth": max_depth, "pokedex_sizes": dict(sorted(histogram.items()))}
+
+
+def print_tree_stats():
+    """
+    Print tree_stats(), plus the operation counters if instrumentation is on.
+    """
+    shape = tree_stats()
+    print("=== Tree stats ===\n"
+          f"Owners: {shape['nodes']}\n"
+          f"Height: {shape['height']}\n"
+          f"Average depth: {shape['avg_depth']:.2f}\n"
+          f"Max depth: {shape['max_depth']}")
+    print("Pokedex sizes:")
+    for size, owners in shape['pokedex_sizes'].items():
+        print(f"  {size} Pokemon: {owners} owner(s)")
+    if treeStats is None:
+        print("Operation counters are off (enable_tree_stats() or run with --stats).")
+        return
+    for op, entry in treeStats['ops'].items():
+        calls = entry['calls']
+        average = entry['comparisons'] / calls if calls else 0.0
+        print(f"{op}: {calls} call(s), {entry['comparisons']} comparisons "
+              f"(avg {average:.1f}, max {entry['max_comparisons']}), {entry['seconds'] * 1000:.3f} ms")
+    print(f"Name normalizations: {treeStats['lower_calls']}\n"
+          f"Max recursion depth: {treeStats['max_recursion_depth']}\n"
+          f"Rotations: {treeStats['rotations']}\n"
+          f"Rebuilds: {treeStats['rebuilds']}")
+
+
+########################
+# 2f) Persistent snapshots (path copying)
+########################
+
+class FrozenOwnerNode:
+    """
+    Node of the persistent owner tree. Never changed once built: every update makes new
+    nodes along one root-to-leaf path and shares every other subtree with the previous
+    version. Reads work like on the other nodes (node['owner'], node['pokedex'] ...);
+    the pokedex is a tuple of IDs and writes raise TypeError.
+    """
+    __slots__ = ('owner', 'key', 'ids', 'left', 'right', 'height')
+
+    def __init__(self, owner, key, ids, left=None, right=None):
+        self.owner = owner
+        self.key = key
+        self.ids = ids
+        self.left = left
+        self.right = right
+        self.height = 1 + max(left.height if left is not None else 0,
+                              right.height if right is not None else 0)
+
+    def __getitem__(self, key):
+        if key == 'pokedex':
+            return CompactPokedex(self.ids)
+        if key == 'pokedex_names':
+            return CompactPokedexNames(self.ids)
+        if key in FrozenOwnerNode.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        raise TypeError("snapshot nodes are read-only")
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+def frozen_copy(node, left, right):
+    return FrozenOwnerNode(node.owner, node.key, node.ids, left, right)
+
+
+def frozen_height(node):
+    return node.height if node is not None else 0
+
+
+def frozen_balance(node, left, right):
+    """
+    A copy of node with these children, rotated like rebalance() if it leans more than
+    one level. Only new nodes are made; left/right and their subtrees are not touched.
+    """
+    if frozen_height(left) > frozen_height(right) + 1:
+        if frozen_height(left.left) < frozen_height(left.right):
+            #left-right case
+            pivot = left.right
+            return frozen_copy(pivot, frozen_copy(left, left.left, pivot.left),
+                               frozen_copy(node, pivot.right, right))
+        return frozen_copy(left, left.left, frozen_copy(node, left.right, right))
+    if frozen_height(right) > frozen_height(left) + 1:
+        if frozen_height(right.right) < frozen_height(right.left):
+            #right-left case
+            pivot = right.left
+            return frozen_copy(pivot, frozen_copy(node, left, pivot.left),
+                               frozen_copy(right, pivot.right, right.right))
+        return frozen_copy(right, frozen_copy(node, left, right.left), right.right)
+    return frozen_copy(node, left, right)
+
+
+def frozen_set(root, owner_name, key, ids):
     """
-    BFS level-order traversal. Print each owner's name and # of pokemons.
+    New version of a persistent tree with owner key holding ids (inserted if it isn't
+    there, pokedex replaced if it is). Makes O(log n) new nodes; root is unchanged.
+    """
+    if root is None:
+        return FrozenOwnerNode(owner_name, key, ids)
+    if key < root.key:
+        return frozen_balance(root, frozen_set(root.left, owner_name, key, ids), root.right)
+    if key > root.key:
+        return frozen_balance(root, root.left, frozen_set(root.right, owner_name, key, ids))
+    return FrozenOwnerNode(owner_name, key, ids, root.left, root.right)
+
+
+def frozen_delete_min(root):
+    if root.left is None:
+        return root.right
+    return frozen_balance(root, frozen_delete_min(root.left), root.right)
+
+
+def frozen_delete(root, key):
+    """
+    New version of a persistent tree without owner key. Makes O(log n) new nodes; unlike
+    delete_owner_node the successor is copied into a new node, nothing is overwritten.
     """
     if root is None:
         return None
-    q = [root]
-    result = []
+    if key < root.key:
+        return frozen_balance(root, frozen_delete(root.left, key), root.right)
+    if key > root.key:
+        return frozen_balance(root, root.left, frozen_delete(root.right, key))
+    if root.left is None:
+        return root.right
+    if root.right is None:
+        return root.left
+    successor = root.right
+    while successor.left is not None:
+        successor = successor.left
+    return frozen_balance(successor, root.left, frozen_delete_min(root.right))
+
+
+def freeze_owner_tree(root):
+    """
+    Persistent copy of a whole owner tree, built balanced in O(n).
+    """
+    nodes = list(iter_in_order(root))
 
-    while q:
-        len_q = len(q)
+    def build(lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        node = nodes[mid]
+        return FrozenOwnerNode(node['owner'], node['key'], tuple(node['pokedex']),
+                               build(lo, mid), build(mid + 1, hi))
+
+    return build(0, len(nodes))
+
+
+def track_snapshot(op, owner_name, ids=()):
+    """
+    Mutation hook: apply one registry change to frozenRoot, by path copying.
+    """
+    global frozenRoot
+    key = owner_key(owner_name)
+    node = ownerIndex.get(key)
+    if op == "delete" or node is None:
+        frozenRoot = frozen_delete(frozenRoot, key)
+    else:
+        frozenRoot = frozen_set(frozenRoot, node['owner'], key, tuple(node['pokedex']))
 
-        for i in range(len_q):
-            # Remove the front of the queue
-            node = q.pop(0)  # No alternative to `pop(0)` without imports
-            result.append(node)  # Add node to the result list
 
-            # Add left child to the queue
-            if node['left'] is not None:
-                q.append(node['left'])
+def enable_snapshots():
+    """
+    Start keeping frozenRoot in sync with the registry: one O(n) copy now, then
+    O(log n) new nodes per change.
+    """
+    global frozenRoot, snapshotTracking
+    if snapshotTracking:
+        return
+    frozenRoot = freeze_owner_tree(ownerRoot)
+    snapshotTracking = True
+    mutationHooks.append(track_snapshot)
 
-            # Add right child to the queue
-            if node['right'] is not None:
-                q.append(node['right'])
 
-    return result
+def disable_snapshots():
+    global frozenRoot, snapshotTracking
+    if track_snapshot in mutationHooks:
+        mutationHooks.remove(track_snapshot)
+    snapshotTracking = False
+    frozenRoot = None
 
-def pre_order(root):
+
+def snapshot_owners():
     """
-    Pre-order traversal (root -> left -> right). Print data for each node.
+    The registry as it is right now, as the root of a read-only tree. O(1) once
+    snapshots are enabled. Later changes never show up in it, so reports, exports and
+    traversals (iter_in_order, export_owners(root=...) ...) can run on it while edits
+    go on. Also the argument for restore_snapshot (undo).
+    """
+    enable_snapshots()
+    return frozenRoot
+
+
+def restore_snapshot(snapshot):
+    """
+    Undo: bring the registry back to an earlier snapshot. Only the owners that differ
+    are deleted / created / refilled, through the normal registry functions, so the
+    indexes, hooks and journal all see ordinary changes. Return #owners changed.
+    """
+    global ownerRoot
+    current = {node['key']: node for node in iter_in_order(ownerRoot)}
+    target = {node.key: node for node in iter_in_order(snapshot)}
+    changed = 0
+    for key, node in current.items():
+        old = target.get(key)
+        if old is None or old.owner != node['owner']:
+            ownerRoot = delete_owner_bst(ownerRoot, node['owner'])
+            changed += 1
+        elif tuple(node['pokedex']) != old.ids:
+            for poke_id in list(node['pokedex']):
+                pokedex_remove(node, poke_id)
+            for poke_id in old.ids:
+                pokedex_add(node, get_poke_dict_by_id(poke_id))
+            changed += 1
+    for key, old in target.items():
+        if key not in ownerIndex:
+            add_owner(new_owner_node(old.owner, [get_poke_dict_by_id(poke_id) for poke_id in old.ids]))
+            changed += 1
+    return changed
+
+
+########################
+# 3) BST Traversals
+########################
+
+def bfs_traversal(root, with_depth=False):
+    """
+    BFS level-order traversal. Yields each node, or (depth, node) pairs if with_depth is set.
+    The queue never holds more than about one level of the tree.
     """
     if root is None:
         return
-    print(f"Owner: {root['owner']}")
-    q = [i for i in root['pokedex']]
-    if q:
-        for i in q:
-            print(", ".join(f"{key}: {value}" for key, value in i.items()))
-    pre_order(root["left"])
-    pre_order(root["right"])
+    q = deque([(0, root)])
+
+    while q:
+        # Remove the front of the queue
+        depth, node = q.popleft()
+        if with_depth:
+            yield depth, node
+        else:
+            yield node
+
+        # Add left child to the queue
+        if node['left'] is not None:
+            q.append((depth + 1, node['left']))
+
+        # Add right child to the queue
+        if node['right'] is not None:
+            q.append((depth + 1, node['right']))
+
+def iter_pre_order(root):
+    """
+    Pre-order traversal (root -> left -> right) with an explicit stack. Yields each node.
+    """
+    stack = [root] if root is not None else []
+    while stack:
+        node = stack.pop()
+        yield node
+        #right is pushed first so left comes out first
+        if node['right'] is not None:
+            stack.append(node['right'])
+        if node['left'] is not None:
+            stack.append(node['left'])
+
+def iter_in_order(root):
+    """
+    In-order traversal (left -> root -> right) with an explicit stack. Yields each node.
+    """
+    stack = []
+    node = root
+    while stack or node is not None:
+        #go down the left spine first
+        while node is not None:
+            stack.append(node)
+            node = node['left']
+        node = stack.pop()
+        yield node
+        node = node['right']
+
+def iter_post_order(root):
+    """
+    Post-order traversal (left -> right -> root) with an explicit stack. Yields each node.
+    """
+    stack = []
+    node = root
+    last_yielded = None
+    while stack or node is not None:
+        while node is not None:
+            stack.append(node)
+            node = node['left']
+        top = stack[-1]
+        #the right subtree still has to be visited before top
+        if top['right'] is not None and top['right'] is not last_yielded:
+            node = top['right']
+        else:
+            stack.pop()
+            last_yielded = top
+            yield top
+
+def pre_order(root):
+    """
+    Pre-order traversal (root -> left -> right). Print data for each node.
+    """
+    render_owners(iter_pre_order(root))
 
 def in_order(root):
     """
     In-order traversal (left -> root -> right). Print data for each node.
     """
-    if root is None:
-        return
-    in_order(root["left"])
-    print(f"Owner: {root['owner']}")
-    q = [i for i in root['pokedex']]
-    if q:
-        for i in q:
-            print(", ".join(f"{key}: {value}" for key, value in i.items()))
-    in_order(root["right"])
+    render_owners(iter_in_order(root))
 
 def post_order(root):
     """
     Post-order traversal (left -> right -> root). Print data for each node.
     """
+    render_owners(iter_post_order(root))
+
+
+########################
+# 3a) Buffered rendering & streaming export
+########################
+
+# Flush rendered text in chunks of about this many characters
+RENDER_BUFFER = 1 << 16
+
+TRAVERSALS = {"bfs": bfs_traversal, "pre": iter_pre_order, "in": iter_in_order, "post": iter_post_order}
+EXPORT_FIELDS = ("ID", "Name", "Type", "HP", "Attack", "Can Evolve")
+
+
+def pokemon_line(pokemon):
+    """
+    "ID: 1, Name: Treecko, ...\n" for one Pokemon, formatted once per species.
+    """
+    line = renderedPokemon.get(pokemon['ID'])
+    if line is None:
+        line = ", ".join(f"{key}: {value}" for key, value in pokemon.items()) + "\n"
+        renderedPokemon[pokemon['ID']] = line
+    return line
+
+
+def write_buffered(lines, out=None):
+    """
+    Write an iterable of text lines to out (stdout by default) in large chunks.
+    """
+    if out is None:
+        out = sys.stdout
+    chunk = []
+    size = 0
+    for line in lines:
+        chunk.append(line)
+        size += len(line)
+        if size >= RENDER_BUFFER:
+            out.write("".join(chunk))
+            chunk = []
+            size = 0
+    if chunk:
+        out.write("".join(chunk))
+
+
+def iter_owner_lines(nodes):
+    for node in nodes:
+        yield f"Owner: {node['owner']}\n"
+        for pokemon in node['pokedex'].values():
+            yield pokemon_line(pokemon)
+
+
+def render_owners(nodes, out=None):
+    """
+    Print each owner's name and pokedex, batched into large writes.
+    """
+    write_buffered(iter_owner_lines(nodes), out)
+
+
+def print_owner(node):
+    """
+    Print one owner's name and every Pokemon in its pokedex.
+    """
+    render_owners([node])
+
+
+def csv_field(text):
+    text = str(text)
+    if any(c in text for c in ',"\r\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def iter_export_lines(root, order="in", fmt="ndjson", kind="all", value=None):
+    """
+    Stream the owners of a traversal (order: bfs/pre/in/post), each with its pokedex
+    filtered by (kind, value) like the display menu, as text lines:
+      "csv"    -> a header, then owner,ID,Name,Type,HP,Attack,Can Evolve per Pokemon
+      "ndjson" -> {"owner": ..., "pokedex": [...]} per owner
+    With a filter, owners with no matching Pokemon are left out.
+    Per-species fragments are formatted once and reused.
+    """
+    traversal = TRAVERSALS[order]
+    if fmt == "csv":
+        yield "owner," + ",".join(EXPORT_FIELDS) + "\n"
+    elif fmt != "ndjson":
+        raise ValueError(f"Unknown export format '{fmt}'.")
+    else:
+        import json  # exports only => kept out of the import of ex7
+    fragments = {}
+    for node in traversal(root):
+        if kind == "all":
+            pokemons = node['pokedex'].values()
+        else:
+            pokemons = query_owner_pokedex(node, kind, value)
+            if not pokemons:
+                continue
+        if fmt == "csv":
+            owner = csv_field(node['owner'])
+            for pokemon in pokemons:
+                row = fragments.get(pokemon['ID'])
+                if row is None:
+                    row = ",".join(csv_field(pokemon[field]) for field in EXPORT_FIELDS) + "\n"
+                    fragments[pokemon['ID']] = row
+                yield owner + "," + row
+        else:
+            parts = []
+            for pokemon in pokemons:
+                part = fragments.get(pokemon['ID'])
+                if part is None:
+                    part = json.dumps({field: pokemon[field] for field in EXPORT_FIELDS})
+                    fragments[pokemon['ID']] = part
+                parts.append(part)
+            yield '{"owner": ' + json.dumps(node['owner']) + ', "pokedex": [' + ", ".join(parts) + "]}\n"
+
+
+def export_owners(path, root=None, order="in", fmt="ndjson", kind="all", value=None):
+    """
+    Stream a traversal (optionally filtered) to a CSV or NDJSON file without building
+    the whole result in memory. root defaults to ownerRoot.
+    """
     if root is None:
-        return
-    post_order(root["left"])
-    post_order(root["right"])
-    print(f"Owner: {root['owner']}")
-    q = [i for i in root['pokedex']]
-    if q:
-        for i in q:
-            print(", ".join(f"{key}: {value}" for key, value in i.items()))
+        root = ownerRoot
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        write_buffered(iter_export_lines(root, order, fmt, kind, value), f)
 
 
+########################
+# 3b) Ordered queries (range / prefix / pages)
+########################
+
+def iter_in_order_from(root, start_key, inclusive=True):
+    """
+    In-order walk that starts at the first owner whose key is >= start_key (> if not
+    inclusive). Descends once to the start, so taking k owners costs O(log n + k).
+    """
+    stack = []
+    node = root
+    #keep only the ancestors still ahead of start_key: they come after their left subtree
+    while node is not None:
+        if node['key'] > start_key or (inclusive and node['key'] == start_key):
+            stack.append(node)
+            node = node['left']
+        else:
+            node = node['right']
+    while stack:
+        node = stack.pop()
+        yield node
+        node = node['right']
+        while node is not None:
+            stack.append(node)
+            node = node['left']
+
+def range_owners_bst(root, low, high):
+    """
+    Yield every owner from name low to name high (both included, any case), alphabetically.
+    """
+    high = owner_key(high)
+    for node in iter_in_order_from(root, owner_key(low)):
+        if node['key'] > high:
+            return
+        yield node
+
+def prefix_owners_bst(root, prefix):
+    """
+    Yield every owner whose name starts with prefix (any case), alphabetically.
+    """
+    prefix = owner_key(prefix)
+    for node in iter_in_order_from(root, prefix):
+        if not node['key'].startswith(prefix):
+            return
+        yield node
+
+def page_owners_bst(root, cursor=None, limit=50):
+    """
+    One page of owners in alphabetical order. Return (owners, next_cursor): pass
+    next_cursor back to get the following page; it is None after the last page.
+    The cursor is just the key of the page's last owner, so it stays valid while owners
+    are added or deleted between pages. Raise ValueError if limit < 1.
+    """
+    if limit < 1:
+        raise ValueError(f"Page limit must be at least 1, got {limit}.")
+    if cursor is None:
+        owners = iter_in_order(root)
+    else:
+        owners = iter_in_order_from(root, cursor, inclusive=False)
+    page = []
+    for node in owners:
+        if len(page) == limit:
+            return page, page[-1]['key']
+        page.append(node)
+    return page, None
+
 ########################
 # 4) Pokedex Operations
 ########################
 
+def pokedex_add(owner_node, pokemon, notify=True):
+    """
+    Append a Pokemon to the owner's pokedex in O(1). Return False if it's already there.
+    The pokedex dict (ID -> Pokemon) keeps insertion order, so display order doesn't change.
+    notify=False: the caller reports the change itself (e.g. as part of an evolve).
+    """
+    if pokemon['ID'] in owner_node['pokedex']:
+        return False
+    unindex_owner_count(owner_node)
+    owner_node['pokedex'][pokemon['ID']] = pokemon
+    owner_node['pokedex_names'][pokemon['Name'].lower()] = pokemon['ID']
+    index_owner_count(owner_node)
+    index_species(pokemon['ID'], owner_node['key'])
+    if notify:
+        notify_mutation("add", owner_node['owner'], [pokemon['ID']])
+    return True
+
+def pokedex_remove(owner_node, poke_id, notify=True):
+    """
+    Remove a Pokemon from the owner's pokedex by ID in O(1). Return it, or None if missing.
+    notify=False: the caller reports the change itself, like pokedex_add.
+    """
+    pokemon = owner_node['pokedex'].get(poke_id)
+    if pokemon is None:
+        return None
+    unindex_owner_count(owner_node)
+    del owner_node['pokedex'][poke_id]
+    del owner_node['pokedex_names'][pokemon['Name'].lower()]
+    index_owner_count(owner_node)
+    unindex_species(poke_id, owner_node['key'])
+    if notify:
+        notify_mutation("release", owner_node['owner'], [poke_id])
+    return pokemon
+
+def pokedex_find_by_name(owner_node, name):
+    """
+    Return the Pokemon called name (any case) in this owner's pokedex, or None.
+    """
+    poke_id = owner_node['pokedex_names'].get(name.lower())
+    if poke_id is None:
+        return None
+    return owner_node['pokedex'][poke_id]
+
 def add_pokemon_to_owner(owner_node):
     """
     Prompt user for a Pokemon ID, find the data, and add to this owner's pokedex if not duplicate.
     """
-    global HOENN_DATA
     pokemon_id = int(input("Enter Pokemon ID to add: "))
     new_pokemon = get_poke_dict_by_id(pokemon_id)
     if new_pokemon is None:#if is not in the csv file
         print(f"ID {pokemon_id} not found in Honen data.")
         return
-    for i in range(len(owner_node['pokedex'])):
-        if new_pokemon['ID'] == owner_node['pokedex'][i]['ID']:#check for duplicates
-            print("Pokemon already in the list. No changes made.")
-            break
+    if not pokedex_add(owner_node, new_pokemon):#duplicate
+        print("Pokemon already in the list. No changes made.")
     else:
-        owner_node['pokedex'].append(new_pokemon)
         print(f"Pokemon {new_pokemon['Name']} "
               f"(ID {new_pokemon['ID']}) added to {owner_node['owner']}'s Pokedex.")
 
@@ -275,56 +1539,112 @@ def release_pokemon_by_name(owner_node, name):
     """
     Removes pokemon from this owner's pokedex if found. returns bool
     """
-    found = False
-    for i in range(len(owner_node['pokedex'])):
-        if owner_node['pokedex'][i]['Name'].lower() == name.lower():
-            del owner_node['pokedex'][i]
-            found = True
-            break
-    if found is False:
+    pokemon = pokedex_find_by_name(owner_node, name)
+    if pokemon is None:
         return False
-    else:
-        return True
+    pokedex_remove(owner_node, pokemon['ID'])
+    return True
 
-def evolve_pokemon_by_name(owner_node):
+def evolve_pokemon(owner_node, name):
     """
-    Evolve a Pokemon by name:
+    Evolve a Pokemon by name, without prompting or printing:
     1) Check if it can evolve
     2) Remove old
     3) Insert new
     4) If new is a duplicate, remove it immediately
+    Return (result, old, new): result is "evolved", "duplicate" (new was already there,
+    so only old was released), "missing" or "cant_evolve".
+    """
+    temp = pokedex_find_by_name(owner_node, name)#current pokemon
+    if temp is None:#didn't found
+        return "missing", None, None
+    target = evolution_target(temp['ID'])
+    if target is None:#can't evolve
+        return "cant_evolve", temp, None
+    #can evolve and found then we check if the evolved is in the pokedex
+    #if it is we only delete the original
+    #else we also add the evolved one
+    evolveded_pokemon = get_poke_dict_by_id(target)  # evolved pokemon
+    pokedex_remove(owner_node, temp['ID'], notify=False)
+    result = "duplicate"
+    if pokedex_add(owner_node, evolveded_pokemon, notify=False):
+        result = "evolved"
+    #one change, not a release then an add => a crash can't keep only half of it
+    notify_mutation("evolve", owner_node['owner'], [temp['ID'], evolveded_pokemon['ID']])
+    return result, temp, evolveded_pokemon
+
+def evolve_all_pokemon(owner_node):
+    """
+    Evolve every Pokemon in the owner's pokedex that can evolve, one stage each, in a
+    single pass. Same result as calling evolve_pokemon on each of them in pokedex order:
+    an evolution that is already in the pokedex is collapsed (only the old one goes).
+    Return (#evolved, #collapsed duplicates).
+    """
+    evolution = get_species_index()["evolution"]
+    original = list(owner_node['pokedex'])
+    ids = dict.fromkeys(original)#ordered set of the new pokedex
+    released, added = [], []
+    pairs = []#old, new, old, new ... like evolve_pokemon reports them
+    duplicates = 0
+    for poke_id in original:
+        target = evolution.get(poke_id)
+        if target is None:
+            continue
+        del ids[poke_id]
+        released.append(poke_id)
+        pairs += (poke_id, target)
+        if target in ids:
+            duplicates += 1
+        else:
+            ids[target] = None
+            added.append(target)
+    if not released:
+        return 0, 0
+    unindex_owner_count(owner_node)
+    pokemons = [get_poke_dict_by_id(poke_id) for poke_id in ids]
+    owner_node['pokedex'] = {p['ID']: p for p in pokemons}
+    owner_node['pokedex_names'] = {p['Name'].lower(): p['ID'] for p in pokemons}
+    index_owner_count(owner_node)
+    for poke_id in released:
+        unindex_species(poke_id, owner_node['key'])
+    for poke_id in added:
+        index_species(poke_id, owner_node['key'])
+    #one record for the whole pass: evolving the pairs in order gives the same pokedex
+    notify_mutation("evolve", owner_node['owner'], pairs)
+    return len(released), duplicates
+
+def evolve_all_owners(root=None):
+    """
+    Registry-wide evolve_all_pokemon. Return {"owners": #owners changed,
+    "evolved": #Pokemon evolved, "duplicates": #collapsed} instead of printing.
+    """
+    if root is None:
+        root = ownerRoot
+    report = {"owners": 0, "evolved": 0, "duplicates": 0}
+    for owner_node in iter_in_order(root):
+        evolved, duplicates = evolve_all_pokemon(owner_node)
+        if evolved:
+            report["owners"] += 1
+            report["evolved"] += evolved
+            report["duplicates"] += duplicates
+    return report
+
+def evolve_pokemon_by_name(owner_node):
+    """
+    Prompt for a Pokemon name and evolve it (see evolve_pokemon).
     """
     name = input("Enter Pokemon Name to evolve: ")
-    found = False
-    for i in owner_node['pokedex']:
-    #check if can evolve
-        if i['Name'].lower() == name.lower() and i['Can Evolve'] == 'TRUE':
-            temp = get_poke_dict_by_id(i['ID'])#current pokemon
-            found = True
-            break
-    else:#didn't found
+    result, temp, evolveded_pokemon = evolve_pokemon(owner_node, name)
+    if result == "missing":
         print(f"No Pokemon named '{name}' in {owner_node['owner']}'s Pokedex.")
         return
-    if found is False:#can't evolve
+    if result == "cant_evolve":
         print(f"Pokemon {name} can't evolve.")
         return
-    #can evolve and found then we check if the evolved is in the list
-    #if it's in the list we delete the original
-    #else we append
-    evolveded_pokemon = get_poke_dict_by_id(i['ID'] + 1)  # evolved pokemon
-    for i in owner_node['pokedex']:
-        if i['ID'] == evolveded_pokemon['ID']:
-            print(f"Pokemon evolved from {temp['Name']} (ID {temp['ID']}) to"
-                  f" {evolveded_pokemon['Name']} (ID {evolveded_pokemon['ID']}).")
-            release_pokemon_by_name(owner_node, temp['Name'])
-            print(f"\n{evolveded_pokemon['Name']} was already present; releasing it immediately.")
-            break
-    else:
-        release_pokemon_by_name(owner_node, temp['Name'])
-        owner_node['pokedex'].append(evolveded_pokemon)
-        print(
-        f"Pokemon evolved from {temp['Name']} (ID {temp['ID']}) to"
-        f" {evolveded_pokemon['Name']} (ID {evolveded_pokemon['ID']}).")
+    print(f"Pokemon evolved from {temp['Name']} (ID {temp['ID']}) to"
+          f" {evolveded_pokemon['Name']} (ID {evolveded_pokemon['ID']}).")
+    if result == "duplicate":
+        print(f"\n{evolveded_pokemon['Name']} was already present; releasing it immediately.")
 
 
 ########################
@@ -333,51 +1653,179 @@ def evolve_pokemon_by_name(owner_node):
 
 def gather_all_owners(root, arr):
     """
-    Collect all BST nodes into a list (arr).
+    Collect all BST nodes into a list (arr), in post-order.
     """
     if root is None:
         return
-
-    if root["left"] is not None:
-        gather_all_owners(root["left"], arr)
-    if root["right"] is not None:
-        gather_all_owners(root["right"], arr)
-    arr.append(root)
+    arr.extend(iter_post_order(root))
     return arr
 
 
+def owner_count_key(owner_node):
+    """
+    Key of an owner in the count index: (#pokedex size, owner_key).
+    """
+    return len(owner_node['pokedex']), owner_node['key']
+
+
+def count_index_insert(root, key, owner_name):
+    """
+    Insert (key -> owner_name) into a count index AVL. Return updated root.
+    """
+    if root is None:
+        return {"key": key, "owner": owner_name, "left": None, "right": None, "height": 1}
+    if key < root['key']:
+        root['left'] = count_index_insert(root['left'], key, owner_name)
+    elif key > root['key']:
+        root['right'] = count_index_insert(root['right'], key, owner_name)
+    else:
+        root['owner'] = owner_name
+        return root
+    return rebalance(root, counted=False)
+
+
+def count_index_delete(root, key):
+    """
+    Remove key from a count index AVL. Return updated root.
+    """
+    if root is None:
+        return None
+    if key < root['key']:
+        root['left'] = count_index_delete(root['left'], key)
+    elif key > root['key']:
+        root['right'] = count_index_delete(root['right'], key)
+    else:
+        if root['left'] is None:
+            return root['right']
+        if root['right'] is None:
+            return root['left']
+        successor = get_successor(root['right'])
+        root['key'] = successor['key']
+        root['owner'] = successor['owner']
+        root['right'] = remove_min_owner(root['right'], counted=False)
+    return rebalance(root, counted=False)
+
+
+def index_owner_count(owner_node):
+    """
+    Add an owner to the count index under its current pokedex size.
+    """
+    global ownerCountRoot
+    ownerCountRoot = count_index_insert(ownerCountRoot, owner_count_key(owner_node), owner_node['owner'])
+
+
+def unindex_owner_count(owner_node):
+    """
+    Drop an owner from the count index. Call before its pokedex size changes.
+    """
+    global ownerCountRoot
+    ownerCountRoot = count_index_delete(ownerCountRoot, owner_count_key(owner_node))
+
+
+def iter_owners_by_num_pokemon(reverse=False):
+    """
+    Yield (owner_name, #pokemon) from fewest to most Pokemon (most to fewest if reverse),
+    ties broken alphabetically. Slice it for top-k or paged reports - no sorting needed.
+    """
+    stack = []
+    node = ownerCountRoot
+    near, far = ('right', 'left') if reverse else ('left', 'right')
+    while stack or node is not None:
+        while node is not None:
+            stack.append(node)
+            node = node[near]
+        node = stack.pop()
+        yield node['owner'], node['key'][0]
+        node = node[far]
+
+
 def sort_owners_by_num_pokemon():
     """
-    Gather owners, sort them by (#pokedex size, then alpha), print results.
+    Print owners sorted by (#pokedex size, then alpha), straight from the count index.
     """
     global ownerRoot
     if ownerRoot is None:
         print("No owners at all.")
         return
     print("=== The Owners we have, sorted by number of Pokemons ===\n")
-    #arr = []
-    #arr = gather_all_owners(ownerRoot, arr)
-    arr = bfs_traversal(ownerRoot)
-    if arr is None:
-        print("failed")
-        return
+    for owner_name, size in iter_owners_by_num_pokemon():
+        print(f"Owner: {owner_name} (has {size} Pokemon)")
 
-    arr.sort(key=lambda x: (len(x['pokedex']), x['owner'].lower()))
 
-    # size_of_arr = len(arr)
-    # for i in range(size_of_arr):
-    #     for j in range(0, size_of_arr - i - 1):
-    #         #usual bubble sort
-    #         if len(arr[j]['pokedex']) > len(arr[j + 1]['pokedex']):
-    #             arr[j], arr[j + 1] = arr[j + 1], arr[j]
-    #         #if there is the same value check for alphabetical
-    #         elif (len(arr[j]['pokedex']) == len(arr[j + 1]['pokedex'])
-    #               and arr[j]['owner'].lower() > arr[j + 1]['owner'].lower()):
-    #             arr[j], arr[j + 1] = arr[j + 1], arr[j]
+########################
+# 5a) Species -> owners index
+########################
+
+def index_species(poke_id, key):
+    speciesOwners.setdefault(poke_id, set()).add(key)
+
+
+def unindex_species(poke_id, key):
+    owners = speciesOwners.get(poke_id)
+    if owners is not None:
+        owners.discard(key)
+        if not owners:
+            del speciesOwners[poke_id]
+
+
+def index_owner_species(owner_node):
+    """
+    Add every Pokemon of this owner to speciesOwners.
+    """
+    for poke_id in owner_node['pokedex']:
+        index_species(poke_id, owner_node['key'])
 
 
-    for i in arr:
-        print(f"Owner: {i['owner']} (has {len(i['pokedex'])} Pokemon)")
+def unindex_owner_species(owner_node):
+    """
+    Drop every Pokemon of this owner from speciesOwners.
+    """
+    for poke_id in owner_node['pokedex']:
+        unindex_species(poke_id, owner_node['key'])
+
+
+def build_species_owners(root):
+    """
+    A species -> owner_keys index built from scratch by walking the tree.
+    """
+    index = {}
+    for owner_node in iter_in_order(root):
+        for poke_id in owner_node['pokedex']:
+            index.setdefault(poke_id, set()).add(owner_node['key'])
+    return index
+
+
+def owners_with_species(poke_id):
+    """
+    Every owner holding this species, alphabetically. O(k log k) for k holders.
+    """
+    return [ownerIndex[key] for key in sorted(speciesOwners.get(poke_id, ()))]
+
+
+def count_owners_with_species(poke_id):
+    """
+    How many owners hold this species, in O(1).
+    """
+    return len(speciesOwners.get(poke_id, ()))
+
+
+def species_owner_counts():
+    """
+    {species ID: #owners holding it} for every species somebody holds.
+    """
+    return {poke_id: len(owners) for poke_id, owners in sorted(speciesOwners.items())}
+
+
+def check_species_owners(root=None):
+    """
+    Consistency check: rebuild the index from the tree and compare it with speciesOwners.
+    Return the species IDs whose owner sets differ (empty list => consistent).
+    """
+    if root is None:
+        root = ownerRoot
+    expected = build_species_owners(root)
+    return sorted(poke_id for poke_id in expected.keys() | speciesOwners.keys()
+                  if expected.get(poke_id) != speciesOwners.get(poke_id))
 
 
 ########################
@@ -400,17 +1848,11 @@ def print_all_owners():
             print("Invalid choice. Please try again.")
             continue
         if input_choice == 1:
-            bfs_res = bfs_traversal(ownerRoot)
-            if bfs_res is None:
+            if ownerRoot is None:
                 print("No owners at all.")
                 continue
             else:
-                for i in bfs_res:
-                    print(f"Owner: {i['owner']}")
-                    for j in i['pokedex']:
-                        print(f"ID: {j['ID']}, Name: {j['Name']}, Type: {j['Type']},"
-                              f" HP: {j['HP']}, Attack: {j['Attack']},"
-                              f" Can Evolve: {j['Can Evolve']}")
+                render_owners(bfs_traversal(ownerRoot))
             break
         elif input_choice == 2:
             pre_order(ownerRoot)
@@ -427,6 +1869,72 @@ def print_all_owners():
 # 7) The Display Filter Sub-Menu
 ########################
 
+FILTER_KINDS = ("type", "evolvable", "attack", "hp", "prefix", "all")
+
+
+def filter_pokedex(pokemons, kind, value=None):
+    """
+    Reference (dict based) filter used by the display menu. Return the matching Pokemon
+    dicts in their original order. kind is one of FILTER_KINDS:
+      "type" (value = type name, any case), "evolvable", "attack" / "hp" (value = minimum),
+      "prefix" (value = start of the name, any case), "all".
+    """
+    if kind == "type":
+        value = value.lower()
+        return [x for x in pokemons if x['Type'].lower() == value]
+    elif kind == "evolvable":
+        return [x for x in pokemons if x['Can Evolve'] == 'TRUE']
+    elif kind == "attack":
+        return [x for x in pokemons if x['Attack'] >= value]
+    elif kind == "hp":
+        return [x for x in pokemons if x['HP'] >= value]
+    elif kind == "prefix":
+        value = value.lower()
+        return [x for x in pokemons if x['Name'].lower().startswith(value)]
+    elif kind == "all":
+        return list(pokemons)
+    raise ValueError(f"Unknown filter kind '{kind}'.")
+
+
+def query_owner_pokedex(owner_node, kind, value=None):
+    """
+    Same result as filter_pokedex on this owner's pokedex, answered through SPECIES_INDEX.
+    """
+    dex = owner_node['pokedex']
+    if kind == "all":
+        return list(dex.values())
+    matching = query_species(kind, value)
+    if len(matching) < len(dex):
+        #few species match => only look those up, then keep display order
+        matching = {i for i in matching if i in dex}
+        if not matching:
+            return []
+    else:
+        matching = set(matching)
+    return [p for p in dex.values() if p['ID'] in matching]
+
+
+def query_all_owners(root, kind, value=None):
+    """
+    Cross-owner search: yield (owner_node, matching Pokemon) for every owner, alphabetically,
+    that has at least one match.
+    """
+    matching = set(query_species(kind, value))
+    if not matching:
+        return
+    for owner_node in iter_in_order(root):
+        q = [p for p in owner_node['pokedex'].values() if p['ID'] in matching]
+        if q:
+            yield owner_node, q
+
+
+def print_filtered(q):
+    if q:
+        write_buffered(pokemon_line(i) for i in q)
+    else:
+        print("There are no Pokemons in this Pokedex that match the criteria.")
+
+
 def display_filter_sub_menu(owner_node):
     """
     1) Only type X
@@ -453,54 +1961,26 @@ def display_filter_sub_menu(owner_node):
             continue
 
         if input_choice == 1:
-            input_1 = input("Which Type? (e.g. GRASS, WATER): ").lower()
-            count = 0
-            q = [x for x in owner_node['pokedex'] if x['Type'].lower() == input_1]
-            if q:
-                for i in q:
-                    print(", ".join(f"{key}: {value}" for key, value in i.items()))
-            else:
-                print("There are no Pokemons in this Pokedex that match the criteria.")
+            input_1 = input("Which Type? (e.g. GRASS, WATER): ")
+            print_filtered(query_owner_pokedex(owner_node, "type", input_1))
 
         elif input_choice == 2:
-            q = [x for x in owner_node['pokedex'] if x['Can Evolve'] == 'TRUE']
-            if q:
-                for i in q:
-                    print(", ".join(f"{key}: {value}" for key, value in i.items()))
-            else:
-                print("There are no Pokemons in this Pokedex that match the criteria.")
+            print_filtered(query_owner_pokedex(owner_node, "evolvable"))
 
         elif input_choice == 3:
             attack_above = int(input("Enter Attack threshold: "))
-            count = 0
-            q = [x for x in owner_node['pokedex'] if x['Attack'] >= attack_above]
-            if q:
-                for i in q:
-                    print(", ".join(f"{key}: {value}" for key, value in i.items()))
-            else:
-                print("There are no Pokemons in this Pokedex that match the criteria.")
+            print_filtered(query_owner_pokedex(owner_node, "attack", attack_above))
 
         elif input_choice == 4:
             hp_above = int(input("Enter HP threshold: "))
-            q = [x for x in owner_node['pokedex'] if x['HP'] >= hp_above]
-            if q:
-                for i in q:
-                    print(", ".join(f"{key}: {value}" for key, value in i.items()))
-            else:
-                print("There are no Pokemons in this Pokedex that match the criteria.")
-        elif input_choice == 5:
-            starting_letters = input("Starting letter(s): ").lower()
+            print_filtered(query_owner_pokedex(owner_node, "hp", hp_above))
 
-            q = [x for x in owner_node['pokedex'] if x['Name'].lower().startswith(starting_letters)]
-            if q:
-                for i in q:
-                    print(", ".join(f"{key}: {value}" for key, value in i.items()))
-            else:
-                print("There are no Pokemons in this Pokedex that match the criteria.")
+        elif input_choice == 5:
+            starting_letters = input("Starting letter(s): ")
+            print_filtered(query_owner_pokedex(owner_node, "prefix", starting_letters))
 
         elif input_choice == 6:
-            for i in owner_node['pokedex']:
-                print(", ".join(f"{key}: {value}" for key, value in i.items()))
+            write_buffered(pokemon_line(i) for i in owner_node['pokedex'].values())
 
         elif input_choice == 7:
             print("Back to Pokedex Menu.")
@@ -513,7 +1993,7 @@ def display_filter_sub_menu(owner_node):
 def existing_pokedex():
     global ownerRoot
     name = input("Owner name: ").lower()
-    current = find_owner_bst(ownerRoot, name)
+    current = find_owner(name)
     if current is None:
         print(f"Owner '{name.lower()}' not found.")
         return
@@ -558,7 +2038,8 @@ def main_menu():
               "3. Delete a Pokedex\n",
               "4. Display owners by number of Pokemon\n",
               "5. Print All\n",
-              "6. Exit\n")
+              "6. Exit\n",
+              "7. Tree stats\n")
         input_choice = read_int_safe("Your choice: ")
         if input_choice is None:
             print("Invalid choice. Please try again.")
@@ -576,13 +2057,13 @@ def main_menu():
             existing_pokedex()
         elif input_choice == 3:
             name = input("Enter owner to delete: ")
-            owner = find_owner_bst(ownerRoot, name)
+            owner = find_owner(name)
             if owner is None:
                 print(f"Owner '{name}' not found.")
                 continue
             else:
                 print(f"Deleting {owner['owner']}'s entire Pokedex...")
-                delete_owner_bst(ownerRoot, name)
+                ownerRoot = delete_owner_bst(ownerRoot, name)
                 print("Pokedex deleted.")
         elif input_choice == 4:
             sort_owners_by_num_pokemon()
@@ -591,12 +2072,38 @@ def main_menu():
         elif input_choice == 6:
             print("Goodbye!")
             break
+        elif input_choice == 7:
+            print_tree_stats()
         else:
             print("Invalid choice. Please try again.")
             continue
 
 def main():
-    main_menu()
+    import argparse
+    parser = argparse.ArgumentParser(description="Pokedex owners manager.")
+    parser.add_argument("--data-dir", help="keep owners in this directory between runs")
+    parser.add_argument("--export", metavar="PATH", help="dump every owner to PATH and exit")
+    parser.add_argument("--export-format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--export-order", choices=tuple(TRAVERSALS), default="in")
+    parser.add_argument("--stats", action="store_true", help="count tree operations (see 7. Tree stats)")
+    args = parser.parse_args()
+    if args.stats:
+        enable_tree_stats()
+    store = None
+    if args.data_dir is not None:
+        import pokedex_storage
+        store, _ = pokedex_storage.open_store(args.data_dir)
+    try:
+        if args.export is not None:
+            export_owners(args.export, ownerRoot, args.export_order, args.export_format)
+        else:
+            main_menu()
+    finally:
+        if store is not None:
+            store.close()
 
 if __name__ == "__main__":
-    main()
+    # Run through the importable `ex7` module so helper modules (pokedex_storage, ...)
+    # see the same registry as the menus
+    import ex7
+    ex7.main()
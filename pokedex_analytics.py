@@ -0,0 +1,248 @@
+# pokedex_analytics.py
+#
+# Registry-wide aggregates: Pokemon per type, evolvable count, and mean / max Attack and
+# HP per owner. The parent only cuts the owner tree into key ranges (from its top
+# levels, without walking it); every worker process walks its own range of the tree,
+# which it shares with the parent through fork, and returns flat arrays. Per-owner results
+# stay columnar: a list of names plus one array per statistic.
+#   python pokedex_analytics.py --owners 1000000 --workers 1,2,4,8
+
+import math
+import multiprocessing
+import os
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import ex7
+
+PER_OWNER_FIELDS = ("pokemon", "mean_attack", "max_attack", "mean_hp", "max_hp")
+
+#species table of the worker process, set by init_worker: lists indexed by ID
+workerSpecies = None
+
+
+def species_columns(species=None):
+    """
+    (type_names, columns) where columns = (type_code, hp, attack, can_evolve), each a
+    list indexed by Pokemon ID. Small enough to send to every worker once.
+    """
+    if species is None:
+        species = ex7.get_hoenn_data()
+    type_names = sorted({p['Type'] for p in species})
+    code = {name: i for i, name in enumerate(type_names)}
+    size = max(p['ID'] for p in species) + 1
+    type_code, hp, attack, can_evolve = [-1] * size, [0] * size, [0] * size, [False] * size
+    for p in species:
+        type_code[p['ID']] = code[p['Type']]
+        hp[p['ID']] = p['HP']
+        attack[p['ID']] = p['Attack']
+        can_evolve[p['ID']] = p['Can Evolve'] == 'TRUE'
+    return type_names, (type_code, hp, attack, can_evolve)
+
+
+def init_worker(columns):
+    global workerSpecies
+    workerSpecies = columns
+
+
+def owner_ids(node):
+    # compact nodes already hold an array('H') => no view, no per-ID lookups
+    return node.ids if isinstance(node, ex7.OwnerNode) else node['pokedex']
+
+
+def shard_bounds(root, shards):
+    """
+    Cut the key space into about `shards` ranges [low, high) without walking the tree:
+    the keys of its top levels (a balanced tree => ~equal sized subtrees between them)
+    are the cut points. low None = from the first owner, high None = to the last one.
+    O(shards) nodes are visited.
+    """
+    keys = []
+    level = deque([root] if root is not None else [])
+    while level and len(keys) + 1 < shards:
+        keys.extend(node['key'] for node in level)
+        level = deque(child for node in level for child in (node['left'], node['right'])
+                      if child is not None)
+    keys.sort()
+    step = max(1, len(keys) // max(1, shards - 1)) if keys else 1
+    cuts = keys[step - 1::step][:shards - 1] if shards > 1 else []
+    bounds = [None] + cuts + [None]
+    return list(zip(bounds, bounds[1:]))
+
+
+def aggregate_range(low, high, root=None, columns=None):
+    """
+    Aggregates of the owners with low <= key < high (None = open end), walking the tree
+    from low. Return (names, type_counts, evolvable, per_owner) where per_owner is a dict
+    of PER_OWNER_FIELDS -> arrays, one entry per owner, in key order. Owners with an
+    empty pokedex get NaN means and 0 maxima.
+    """
+    if root is None:
+        root = ex7.ownerRoot
+    type_code, hp, attack, can_evolve = columns if columns is not None else workerSpecies
+    type_counts = [0] * (max(type_code) + 1)
+    evolvable = 0
+    names = []
+    sizes, max_attack, max_hp = array('I'), array('I'), array('I')
+    mean_attack, mean_hp = array('d'), array('d')
+    nodes = ex7.iter_in_order(root) if low is None else ex7.iter_in_order_from(root, low)
+    for node in nodes:
+        if high is not None and node['key'] >= high:
+            break
+        total_attack = total_hp = top_attack = top_hp = size = 0
+        for poke_id in owner_ids(node):
+            type_counts[type_code[poke_id]] += 1
+            if can_evolve[poke_id]:
+                evolvable += 1
+            a, h = attack[poke_id], hp[poke_id]
+            total_attack += a
+            total_hp += h
+            if a > top_attack:
+                top_attack = a
+            if h > top_hp:
+                top_hp = h
+            size += 1
+        names.append(node['owner'])
+        sizes.append(size)
+        max_attack.append(top_attack)
+        max_hp.append(top_hp)
+        mean_attack.append(total_attack / size if size else math.nan)
+        mean_hp.append(total_hp / size if size else math.nan)
+    per_owner = {"pokemon": sizes, "mean_attack": mean_attack, "max_attack": max_attack,
+                 "mean_hp": mean_hp, "max_hp": max_hp}
+    return names, type_counts, evolvable, per_owner
+
+
+def aggregate_range_in_worker(low, high):
+    # the tree is the one this process inherited from the parent at fork time
+    return aggregate_range(low, high)
+
+
+def merge_results(type_names, partials):
+    """
+    Concatenate the per-range partials (in key order) into the report. Per-owner
+    results stay columnar: report["per_owner"] = {"names": [...], field: array, ...}.
+    """
+    type_totals = [0] * len(type_names)
+    evolvable = 0
+    names = []
+    per_owner = {"pokemon": array('I'), "mean_attack": array('d'), "max_attack": array('I'),
+                 "mean_hp": array('d'), "max_hp": array('I')}
+    for range_names, type_counts, range_evolvable, columns in partials:
+        for code, count in enumerate(type_counts):
+            type_totals[code] += count
+        evolvable += range_evolvable
+        names.extend(range_names)
+        for field in PER_OWNER_FIELDS:
+            per_owner[field].extend(columns[field])
+    return {"owners": len(names),
+            "pokemon": sum(type_totals),
+            "evolvable": evolvable,
+            "types": {name: count for name, count in zip(type_names, type_totals) if count},
+            "per_owner": {"names": names, **per_owner}}
+
+
+def owner_stats(size, sum_attack, max_attack, sum_hp, max_hp):
+    if size == 0:
+        return {"pokemon": 0, "mean_attack": None, "max_attack": None, "mean_hp": None, "max_hp": None}
+    return {"pokemon": size, "mean_attack": sum_attack / size, "max_attack": max_attack,
+            "mean_hp": sum_hp / size, "max_hp": max_hp}
+
+
+def per_owner_dicts(report):
+    """
+    The report with per_owner turned into {owner_name: {field: value}} like
+    serial_analytics returns. Builds one dict per owner - for comparisons, not hot paths.
+    """
+    columns = report["per_owner"]
+    per_owner = {}
+    for i, name in enumerate(columns["names"]):
+        if columns["pokemon"][i] == 0:
+            per_owner[name] = owner_stats(0, 0, 0, 0, 0)
+        else:
+            per_owner[name] = {field: columns[field][i] for field in PER_OWNER_FIELDS}
+    return {**report, "per_owner": per_owner}
+
+
+def parallel_analytics(root=None, workers=None, shards=None):
+    """
+    Aggregates over every owner, computed by `workers` processes (default: CPU count)
+    over `shards` key ranges (default: 4 per worker, to even out the load).
+    Workers read the tree they inherit through fork; where fork isn't available
+    (Windows, or a root other than ownerRoot) the ranges are computed in this process.
+    """
+    if root is None:
+        root = ex7.ownerRoot
+    workers = workers or os.cpu_count() or 1
+    type_names, columns = species_columns()
+    bounds = shard_bounds(root, shards or workers * 4)
+    can_fork = "fork" in multiprocessing.get_all_start_methods() and root is ex7.ownerRoot
+    if workers == 1 or not can_fork:
+        partials = [aggregate_range(low, high, root, columns) for low, high in bounds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"),
+                                 initializer=init_worker, initargs=(columns,)) as pool:
+            partials = list(pool.map(aggregate_range_in_worker, [low for low, _ in bounds],
+                                     [high for _, high in bounds]))
+    return merge_results(type_names, partials)
+
+
+def serial_analytics(root=None):
+    """
+    Reference implementation: one walk over gather_all_owners and the Pokemon dicts.
+    """
+    if root is None:
+        root = ex7.ownerRoot
+    owners = ex7.gather_all_owners(root, []) or []
+    types = {}
+    evolvable = pokemon = 0
+    per_owner = {}
+    for owner_node in owners:
+        dex = list(owner_node['pokedex'].values())
+        for p in dex:
+            types[p['Type']] = types.get(p['Type'], 0) + 1
+            if p['Can Evolve'] == 'TRUE':
+                evolvable += 1
+        pokemon += len(dex)
+        per_owner[owner_node['owner']] = owner_stats(
+            len(dex), sum(p['Attack'] for p in dex), max((p['Attack'] for p in dex), default=0),
+            sum(p['HP'] for p in dex), max((p['HP'] for p in dex), default=0))
+    return {"owners": len(owners), "pokemon": pokemon, "evolvable": evolvable,
+            "types": dict(sorted(types.items())), "per_owner": per_owner}
+
+
+def main():
+    import argparse
+    import json
+    import random
+    parser = argparse.ArgumentParser(description="Time the sharded analytics against the serial reference.")
+    parser.add_argument("--owners", type=int, default=1000000)
+    parser.add_argument("--max-dex", type=int, default=8)
+    parser.add_argument("--workers", default="1,2,4", help="comma separated worker counts to time")
+    parser.add_argument("--compact", action="store_true", help="build compact OwnerNode owners")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    data = ex7.get_hoenn_data()
+    ex7.clear_registry()
+    ex7.compactOwners = args.compact
+    ex7.bulk_load_owners([(f"owner{i:07d}", [p['ID'] for p in rng.sample(data, rng.randint(1, args.max_dex))])
+                          for i in range(args.owners)], presorted=True)
+
+    start = time.perf_counter()
+    reference = serial_analytics()
+    report = {"owners": args.owners, "serial_seconds": round(time.perf_counter() - start, 3), "parallel": {}}
+    for workers in (int(w) for w in args.workers.split(",")):
+        start = time.perf_counter()
+        result = parallel_analytics(workers=workers)
+        seconds = time.perf_counter() - start
+        report["parallel"][workers] = {"seconds": round(seconds, 3),
+                                       "matches_serial": per_owner_dicts(result) == reference}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# pokedex_batch.py
+
+import csv
+import json
+import sys
+import time
+
+import ex7
+
+COMMAND_OPS = ("create", "add", "release", "evolve", "evolve_all", "delete", "query", "holders")
+# JSON type of every command field (missing / null fields are not checked)
+FIELD_TYPES = {"op": str, "owner": str, "name": str, "filter": str,
+               "id": int, "starter": int, "ids": list}
+
+
+def check_fields(command, field_types=FIELD_TYPES):
+    """
+    Raise TypeError if a field of command has the wrong JSON type, e.g. "name": 5,
+    so a bad record is reported instead of failing deep inside the tree functions.
+    """
+    if not isinstance(command, dict):
+        raise TypeError("A command must be a JSON object.")
+    for field, kind in field_types.items():
+        value = command.get(field)
+        if value is None:
+            continue
+        #bool is an int subclass in Python, but true/false is never a valid ID
+        if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+            raise TypeError(f"Field '{field}' must be {kind.__name__}, got {type(value).__name__}.")
+    if any(not isinstance(i, int) or isinstance(i, bool) for i in command.get("ids") or ()):
+        raise TypeError("Field 'ids' must be a list of ints.")
+    value = command.get("value")
+    if value is not None:
+        if command.get("filter") in ("attack", "hp"):
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise TypeError(f"Field 'value' must be int for filter '{command['filter']}'.")
+        elif not isinstance(value, str):
+            raise TypeError("Field 'value' must be str.")
+
+
+def parse_command(line):
+    """
+    Turn one input line into a command dict. Accepts either a JSON object:
+      {"op": "create", "owner": "Ash", "starter": 1}      (or "ids": [1, 4])
+      {"op": "add", "owner": "Ash", "id": 25}             (or "ids": [...])
+      {"op": "release" | "evolve", "owner": "Ash", "name": "Treecko"}
+      {"op": "evolve_all", "owner": "Ash"}                (no owner: every owner)
+      {"op": "delete", "owner": "Ash"}
+      {"op": "query", "owner": "Ash", "filter": "type", "value": "grass"}
+      {"op": "query", "filter": "hp", "value": 70}          (every owner)
+      {"op": "holders", "id": 25}     (owners holding a species; no id: #holders per species)
+    or a CSV row with the same fields in order: op,owner,arg[,value]
+      create,Ash,1   add,Ash,25   release,Ash,Treecko   evolve,Ash,Treecko
+      evolve_all,Ash   evolve_all   delete,Ash   query,Ash,type,grass   query,,hp,70
+      holders,,25   holders
+    Return None for blank lines and # comments.
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('{'):
+        command = json.loads(line)
+        check_fields(command)
+        return command
+    row = next(csv.reader([line]))
+    row += [""] * (4 - len(row))
+    op, owner, arg, value = (field.strip() for field in row[:4])
+    command = {"op": op.lower(), "owner": owner}
+    if command["op"] == "create":
+        command["starter"] = int(arg)
+    elif command["op"] == "add":
+        command["id"] = int(arg)
+    elif command["op"] in ("release", "evolve"):
+        command["name"] = arg
+    elif command["op"] == "holders" and arg:
+        command["id"] = int(arg)
+    elif command["op"] == "query":
+        command["filter"] = arg or "all"
+        command["value"] = int(value) if command["filter"] in ("attack", "hp") else value
+    return command
+
+
+def find_owner_or_fail(command):
+    owner_node = ex7.find_owner(command["owner"])
+    if owner_node is None:
+        raise LookupError(f"Owner '{command['owner']}' not found.")
+    return owner_node
+
+
+def run_command(command):
+    """
+    Run one command straight against the ex7 tree functions.
+    Return a dict describing the result; raise on bad input.
+    """
+    op = command.get("op")
+    if op == "create":
+        if "ids" in command:
+            pokemons = [ex7.get_poke_dict_by_id(i) for i in command["ids"]]
+        else:
+            pokemons = [ex7.get_poke_dict_by_id(ex7.STARTER_IDS[command.get("starter", 1)])]
+        if None in pokemons:
+            raise LookupError("Unknown Pokemon ID.")
+        if not ex7.add_owner(ex7.new_owner_node(command["owner"], pokemons)):
+            raise ValueError(f"Owner '{command['owner']}' already exists.")
+        return {"created": command["owner"]}
+    elif op == "add":
+        owner_node = find_owner_or_fail(command)
+        #check every ID first, like create: a bad one must not leave the others added
+        pokemons = []
+        for poke_id in command.get("ids", [command.get("id")]):
+            pokemon = ex7.get_poke_dict_by_id(poke_id)
+            if pokemon is None:
+                raise LookupError(f"ID {poke_id} not found in Honen data.")
+            pokemons.append(pokemon)
+        added = []
+        for pokemon in pokemons:
+            if ex7.pokedex_add(owner_node, pokemon):
+                added.append(pokemon['ID'])
+        return {"added": added}
+    elif op == "release":
+        owner_node = find_owner_or_fail(command)
+        if not ex7.release_pokemon_by_name(owner_node, command["name"]):
+            raise LookupError(f"No Pokemon named '{command['name']}' in {owner_node['owner']}'s Pokedex.")
+        return {"released": command["name"]}
+    elif op == "evolve":
+        owner_node = find_owner_or_fail(command)
+        result, old, new = ex7.evolve_pokemon(owner_node, command["name"])
+        if result == "missing":
+            raise LookupError(f"No Pokemon named '{command['name']}' in {owner_node['owner']}'s Pokedex.")
+        if result == "cant_evolve":
+            raise ValueError(f"Pokemon {command['name']} can't evolve.")
+        return {"evolved": old['ID'], "into": new['ID'], "duplicate": result == "duplicate"}
+    elif op == "evolve_all":
+        if command.get("owner"):
+            evolved, duplicates = ex7.evolve_all_pokemon(find_owner_or_fail(command))
+            return {"owners": 1 if evolved else 0, "evolved": evolved, "duplicates": duplicates}
+        return ex7.evolve_all_owners(ex7.ownerRoot)
+    elif op == "delete":
+        find_owner_or_fail(command)
+        ex7.ownerRoot = ex7.delete_owner_bst(ex7.ownerRoot, command["owner"])
+        return {"deleted": command["owner"]}
+    elif op == "query":
+        kind = command.get("filter", "all")
+        value = command.get("value")
+        if command.get("owner"):
+            owner_node = find_owner_or_fail(command)
+            return {"ids": [p['ID'] for p in ex7.query_owner_pokedex(owner_node, kind, value)]}
+        return {"owners": {owner_node['owner']: [p['ID'] for p in q]
+                           for owner_node, q in ex7.query_all_owners(ex7.ownerRoot, kind, value)}}
+    elif op == "holders":
+        if command.get("id") is None:
+            return {"counts": ex7.species_owner_counts()}
+        return {"owners": [node['owner'] for node in ex7.owners_with_species(command["id"])],
+                "count": ex7.count_owners_with_species(command["id"])}
+    raise ValueError(f"Unknown op '{op}' (expected one of {', '.join(COMMAND_OPS)}).")
+
+
+def run_batch(lines, out, echo=True):
+    """
+    Run every command in lines, writing one NDJSON result per command to out (errors
+    always, successes only if echo) and a final {"summary": ...} line.
+    Return the summary dict: "commands" counts every non-blank line, including the
+    ones that failed to parse, so "errors" is always a part of "commands".
+    """
+    commands = errors = 0
+    start = time.perf_counter()
+    for line_no, line in enumerate(lines, 1):
+        command = None
+        try:
+            command = parse_command(line)
+            if command is None:
+                continue
+            commands += 1
+            result = run_command(command)
+            if echo:
+                out.write(json.dumps({"line": line_no, "op": command["op"], "ok": True, **result}) + "\n")
+        except (ValueError, LookupError, KeyError, TypeError) as e:
+            if command is None:
+                commands += 1  # the line didn't parse
+            errors += 1
+            out.write(json.dumps({"line": line_no, "ok": False, "error": str(e)}) + "\n")
+        except Exception as e:
+            #anything else is still one bad record, not the end of the batch
+            if command is None:
+                commands += 1
+            errors += 1
+            out.write(json.dumps({"line": line_no, "ok": False,
+                                  "error": f"{type(e).__name__}: {e}"}) + "\n")
+    seconds = time.perf_counter() - start
+    summary = {"commands": commands, "errors": errors, "seconds": round(seconds, 6),
+               "ops_per_sec": round(commands / seconds, 1) if seconds > 0 else None}
+    out.write(json.dumps({"summary": summary}) + "\n")
+    out.flush()
+    return summary
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Run Pokedex commands from a file, without menus.")
+    parser.add_argument("input", nargs="?", default="-", help="command file (JSON or CSV lines), - for stdin")
+    parser.add_argument("--quiet", action="store_true", help="only print errors and the summary")
+    parser.add_argument("--data-dir", help="load/journal the registry in this directory (see pokedex_storage)")
+    args = parser.parse_args(argv)
+    store = None
+    if args.data_dir is not None:
+        import pokedex_storage
+        store, _ = pokedex_storage.open_store(args.data_dir)
+    try:
+        if args.input == "-":
+            run_batch(sys.stdin, sys.stdout, echo=not args.quiet)
+        else:
+            with open(args.input, 'r', encoding='utf-8') as f:
+                run_batch(f, sys.stdout, echo=not args.quiet)
+    finally:
+        if store is not None:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# pokedex_columns.py
+
+import numpy as np
+
+import ex7
+
+
+def build_species_columns(species=None):
+    """
+    Turn the species table (HOENN_DATA by default) into NumPy columns:
+      "ID", "HP", "Attack"  -> int32 arrays
+      "Can Evolve"          -> bool array
+      "Type"                -> int16 codes into "type_names" (lowercase)
+      "name_lower"          -> lowercase names, for prefix matching
+      "row_of_id"           -> ID -> row index (-1 for unknown IDs)
+    """
+    if species is None:
+        species = ex7.HOENN_DATA
+    type_names = sorted({p['Type'].lower() for p in species})
+    type_code = {name: code for code, name in enumerate(type_names)}
+    ids = np.array([p['ID'] for p in species], dtype=np.int32)
+    row_of_id = np.full(int(ids.max()) + 1 if len(ids) else 1, -1, dtype=np.int32)
+    row_of_id[ids] = np.arange(len(ids), dtype=np.int32)
+    return {
+        "ID": ids,
+        "HP": np.array([p['HP'] for p in species], dtype=np.int32),
+        "Attack": np.array([p['Attack'] for p in species], dtype=np.int32),
+        "Can Evolve": np.array([p['Can Evolve'] == 'TRUE' for p in species], dtype=bool),
+        "Type": np.array([type_code[p['Type'].lower()] for p in species], dtype=np.int16),
+        "type_names": type_names,
+        "name_lower": np.array([p['Name'].lower() for p in species], dtype=str),
+        "row_of_id": row_of_id,
+    }
+
+
+def owner_id_array(owner_node):
+    """
+    The owner's pokedex as an int32 array of IDs, in display order.
+    """
+    dex = owner_node['pokedex']
+    return np.fromiter(dex.keys(), dtype=np.int32, count=len(dex))
+
+
+def filter_mask(columns, ids, kind, value=None):
+    """
+    Vectorized version of ex7.filter_pokedex: a boolean mask over an array of IDs.
+    """
+    rows = columns["row_of_id"][ids]
+    if kind == "type":
+        names = columns["type_names"]
+        value = value.lower()
+        if value not in names:
+            return np.zeros(len(ids), dtype=bool)
+        return columns["Type"][rows] == names.index(value)
+    elif kind == "evolvable":
+        return columns["Can Evolve"][rows]
+    elif kind == "attack":
+        return columns["Attack"][rows] >= value
+    elif kind == "hp":
+        return columns["HP"][rows] >= value
+    elif kind == "prefix":
+        return np.char.startswith(columns["name_lower"][rows], value.lower())
+    elif kind == "all":
+        return np.ones(len(ids), dtype=bool)
+    raise ValueError(f"Unknown filter kind '{kind}'.")
+
+
+def filter_owner_pokedex(columns, owner_node, kind, value=None):
+    """
+    Filter one owner's pokedex with a vectorized mask. Return the matching Pokemon dicts
+    in display order, same as ex7.filter_pokedex.
+    """
+    ids = owner_id_array(owner_node)
+    dex = owner_node['pokedex']
+    return [dex[poke_id] for poke_id in ids[filter_mask(columns, ids, kind, value)].tolist()]
+
+
+def filter_all_owners(columns, root, kind, value=None):
+    """
+    Evaluate one filter over every owner in the tree with a single mask.
+    Return a list of (owner_name, [matching IDs]) in alphabetical owner order.
+    """
+    owners = list(ex7.iter_in_order(root))
+    if not owners:
+        return []
+    sizes = np.fromiter((len(o['pokedex']) for o in owners), dtype=np.int64, count=len(owners))
+    ids = np.fromiter((poke_id for o in owners for poke_id in o['pokedex']),
+                      dtype=np.int32, count=int(sizes.sum()))
+    mask = filter_mask(columns, ids, kind, value)
+    #matches before each owner's segment => where its matches start in ids[mask]
+    ends = np.cumsum(sizes)
+    matched_before = np.concatenate(([0], np.cumsum(mask)))
+    cuts = matched_before[ends[:-1]]
+    per_owner = np.split(ids[mask], cuts)
+    return [(o['owner'], part.tolist()) for o, part in zip(owners, per_owner)]
+
+
+def compare_with_reference(root, filters, columns=None):
+    """
+    Run every (kind, value) in filters through both the dict based ex7.filter_pokedex and
+    the vectorized path, for every owner. Return a list of (owner, kind, value) that differ.
+    """
+    if columns is None:
+        columns = build_species_columns()
+    mismatches = []
+    for kind, value in filters:
+        everyone = dict(filter_all_owners(columns, root, kind, value))
+        for owner_node in ex7.iter_in_order(root):
+            expected = ex7.filter_pokedex(owner_node['pokedex'].values(), kind, value)
+            single = filter_owner_pokedex(columns, owner_node, kind, value)
+            expected_ids = [p['ID'] for p in expected]
+            if single != expected or everyone[owner_node['owner']] != expected_ids:
+                mismatches.append((owner_node['owner'], kind, value))
+    return mismatches
@@ -1,93 +1,483 @@
-# pokedex_gui.py
-
-import tkinter as tk
-from PIL import Image, ImageTk
-import os
-
-
-def show_Pokedex_GUI(pokeList):
-    """
-    Display each Pokemon in a simple Tkinter window with its Name, Type, HP,
-    Attack, and optionally an image from the 'pokemons' folder.
-    We allow horizontal resizing so each Pokemon 'frame' expands in width.
-    """
-    root = tk.Tk()
-    root.title("My Pokedex GUI")
-
-    # Create a canvas and a vertical scrollbar
-    canvas = tk.Canvas(root)
-    scrollbar = tk.Scrollbar(root, orient="vertical", command=canvas.yview)
-    canvas.configure(yscrollcommand=scrollbar.set)
-
-    # This 'scrollable_frame' is where we'll place each Pokemon frame.
-    scrollable_frame = tk.Frame(canvas)
-
-    # A callback to update the scrollregion whenever 'scrollable_frame' changes size
-    def on_frame_configure(event):
-        canvas.configure(scrollregion=canvas.bbox("all"))
-
-    scrollable_frame.bind("<Configure>", on_frame_configure)
-
-    # Actually place 'scrollable_frame' in the canvas
-    # We'll store the canvas window ID so we can update its width on resize
-    canvas_window = canvas.create_window(
-        (0, 0), window=scrollable_frame, anchor="nw")
-
-    # A callback to keep the scrollable_frame the same width as the canvas
-    def on_canvas_configure(event):
-        # Set the scrollable_frame width to match canvas' width
-        canvas.itemconfig(canvas_window, width=event.width)
-
-    canvas.bind("<Configure>", on_canvas_configure)
-
-    # Mouse wheel handling
-    def on_mouse_wheel(event):
-        # On Windows/macOS: event.delta is typically ±120 per wheel step
-        canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-
-    canvas.bind_all("<MouseWheel>", on_mouse_wheel)  # Windows/macOS
-    # For Linux (buttons 4=up, 5=down):
-    canvas.bind_all("<Button-4>", lambda e: canvas.yview_scroll(-1, "units"))
-    canvas.bind_all("<Button-5>", lambda e: canvas.yview_scroll(1, "units"))
-
-    # Pack the canvas and scrollbar
-    canvas.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
-
-    if not pokeList:
-        msg = tk.Label(scrollable_frame, text="No Pokemon in this Pokedex!")
-        msg.pack(padx=10, pady=10)
-    else:
-        for poke in pokeList:
-            # Create a frame for each Pokémon, fill horizontally, expand so it can grow
-            frame = tk.Frame(scrollable_frame, bd=2,
-                             relief='groove', padx=5, pady=5)
-            frame.pack(side="top", fill="x", expand=True, padx=10, pady=5)
-
-            # Pokemon text info
-            info = (
-                f"ID: {poke['ID']} | "
-                f"Name: {poke['Name']} | "
-                f"Type: {poke['Type']} | "
-                f"HP: {poke['HP']} | "
-                f"Attack: {poke['Attack']} | "
-                f"Can Evolve: {poke['Can Evolve']}"
-            )
-            # The text label also fills horizontally and expands
-            label = tk.Label(frame, text=info, anchor="w")
-            label.pack(side="left", fill="x", expand=True)
-
-            image_path = os.path.join("pokemons", f"{poke['ID'] + 251}.png")
-            if os.path.exists(image_path):
-                try:
-                    img = Image.open(image_path)
-                    img = img.resize((80, 80), Image.ANTIALIAS)
-                    photo = ImageTk.PhotoImage(img)
-                    picLabel = tk.Label(frame, image=photo)
-                    picLabel.photo = photo  # keep reference
-                    picLabel.pack(side="right", padx=5)
-                except Exception as e:
-                    print(f"Error loading image {image_path}: {e}")
-                    # If error, we'll ignore and just not show the image
-
-    root.mainloop()
+# pokedex_gui.py
+
+import tkinter as tk
+from PIL import Image, ImageTk
+import mmap
+import os
+import queue
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+SPRITE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pokemons")
+THUMBNAIL_PACK = os.path.join(SPRITE_DIR, "thumbnails.pack")
+THUMBNAIL_SIZE = 80
+
+# Pack layout (little endian):
+#   header: magic, version, thumbnail size, #sprites
+#   index:  sprite number, source PNG mtime_ns, source PNG size, offset, length per sprite
+#   then:   the thumbnails as raw RGBA bytes, at the offsets in the index
+PACK_MAGIC = b"PKTH"
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct("<4sHHI")
+PACK_ENTRY = struct.Struct("<IqqQI")
+
+thumbnailPack = None
+
+
+def sprite_sources(sprite_dir=SPRITE_DIR):
+    """
+    {sprite number: (mtime_ns, size)} for every NNN.png in sprite_dir.
+    """
+    sources = {}
+    for entry in os.scandir(sprite_dir):
+        stem, ext = os.path.splitext(entry.name)
+        if ext.lower() == ".png" and stem.isdigit():
+            stat = entry.stat()
+            sources[int(stem)] = (stat.st_mtime_ns, stat.st_size)
+    return sources
+
+
+def build_thumbnail_pack(sprite_dir=SPRITE_DIR, pack_path=THUMBNAIL_PACK, size=THUMBNAIL_SIZE):
+    """
+    Resize every sprite once and write them all into one packed file.
+    Written to a temp file first so a half-written pack is never picked up.
+    """
+    sources = sprite_sources(sprite_dir)
+    thumbs = []
+    for number in sorted(sources):
+        path = os.path.join(sprite_dir, f"{number}.png")
+        try:
+            with Image.open(path) as img:
+                thumbs.append((number, img.convert("RGBA").resize((size, size), Image.LANCZOS).tobytes()))
+        except OSError as e:
+            print(f"Error loading image {path}: {e}")
+            thumbs.append((number, b""))  # recorded empty, so the pack isn't rebuilt on every open
+    entries = []
+    offset = PACK_HEADER.size + PACK_ENTRY.size * len(thumbs)
+    for number, blob in thumbs:
+        entries.append(PACK_ENTRY.pack(number, *sources[number], offset, len(blob)))
+        offset += len(blob)
+    #unique per process and thread: two windows (or processes) rebuilding at once
+    #must not write into the same temp file
+    temp_path = f"{pack_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, size, len(entries)))
+            f.write(b"".join(entries))
+            for _, blob in thumbs:
+                f.write(blob)
+        os.replace(temp_path, pack_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ThumbnailPack:
+    """
+    A thumbnail pack, memory-mapped. get(number) returns a PIL image ready for
+    ImageTk.PhotoImage, from an LRU cache of the last `cache_size` thumbnails.
+    Safe to call get from several threads.
+    """
+
+    def __init__(self, pack_path=THUMBNAIL_PACK, cache_size=256):
+        self.pack_path = pack_path
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.index = {}
+        self.sources = {}
+        with open(pack_path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, count = PACK_HEADER.unpack_from(self.data)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.close()
+            raise ValueError(f"Not a thumbnail pack: {pack_path}")
+        for number, mtime_ns, source_size, offset, length in PACK_ENTRY.iter_unpack(
+                self.data[PACK_HEADER.size:PACK_HEADER.size + PACK_ENTRY.size * count]):
+            self.index[number] = (offset, length)
+            self.sources[number] = (mtime_ns, source_size)
+
+    def is_stale(self, sources, size=THUMBNAIL_SIZE):
+        # Any sprite added, removed or changed since the pack was built
+        return self.size != size or self.sources != sources
+
+    def get(self, number):
+        with self.lock:
+            img = self.cache.get(number)
+            if img is not None:
+                self.cache.move_to_end(number)
+                return img
+        offset, length = self.index.get(number, (0, 0))
+        if length == 0:
+            return None
+        img = Image.frombytes("RGBA", (self.size, self.size), self.data[offset:offset + length])
+        with self.lock:
+            self.cache[number] = img
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return img
+
+    def close(self):
+        self.data.close()
+        self.cache.clear()
+
+
+def get_thumbnail_pack(sprite_dir=SPRITE_DIR, pack_path=THUMBNAIL_PACK, build=True):
+    """
+    The open thumbnail pack, (re)built first if it is missing or any source PNG changed
+    (or None in that case if build=False). Only stats the sprites - nothing is decoded
+    unless the pack has to be rebuilt.
+    """
+    global thumbnailPack
+    sources = sprite_sources(sprite_dir)
+    if thumbnailPack is not None and not thumbnailPack.is_stale(sources):
+        return thumbnailPack
+    if thumbnailPack is not None:
+        thumbnailPack.close()
+        thumbnailPack = None
+    try:
+        pack = ThumbnailPack(pack_path)
+        if pack.is_stale(sources):
+            pack.close()
+            pack = None
+    except (OSError, ValueError, struct.error):
+        pack = None
+    if pack is None:
+        if not build:
+            return None
+        build_thumbnail_pack(sprite_dir, pack_path)
+        pack = ThumbnailPack(pack_path)
+    thumbnailPack = pack
+    return thumbnailPack
+
+
+def load_thumbnail(number, thumbnails=None, sprite_dir=SPRITE_DIR):
+    """
+    The 80x80 thumbnail of one sprite as a PIL image (None if there is no such sprite):
+    from the pack if there is an up to date one, else decoded and resized from the PNG.
+    """
+    if thumbnails is not None:
+        return thumbnails.get(number)
+    path = os.path.join(sprite_dir, f"{number}.png")
+    if not os.path.exists(path):
+        return None
+    try:
+        with Image.open(path) as img:
+            return img.convert("RGBA").resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.LANCZOS)
+    except OSError as e:
+        print(f"Error loading image {path}: {e}")
+        return None
+
+
+class SpriteLoader:
+    """
+    Loads thumbnails on a thread pool so the window can paint before any sprite is ready.
+    request() returns the PhotoImage if it is already loaded, else a blank placeholder
+    and calls callback(photo) on the Tk thread once it arrives (photo is None for a
+    missing sprite). Workers hand finished images over through a queue that the Tk
+    thread polls with after(); PhotoImages are only ever created on the Tk thread.
+    """
+
+    def __init__(self, root, thumbnails=None, workers=4, poll_ms=30):
+        self.root = root
+        self.thumbnails = thumbnails
+        self.poll_ms = poll_ms
+        self.results = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.closed = threading.Event()
+        self.photos = {}   # sprite number -> PhotoImage (None for missing sprites)
+        self.waiting = {}  # sprite number -> callbacks waiting for it
+        self.placeholder = tk.PhotoImage(master=root, width=THUMBNAIL_SIZE, height=THUMBNAIL_SIZE)
+        self.after_id = root.after(poll_ms, self.poll)
+        if thumbnails is None:
+            # No up to date pack => decode the PNGs directly this time, and rebuild
+            # the pack after the sprites that were asked for first
+            self.root.after_idle(self.rebuild_pack)
+
+    def rebuild_pack(self):
+        if not self.closed.is_set():
+            self.executor.submit(build_thumbnail_pack)
+
+    def request(self, number, callback):
+        if number in self.photos:
+            return self.photos[number]
+        if self.closed.is_set():
+            return self.placeholder
+        if number in self.waiting:
+            self.waiting[number].append(callback)
+        else:
+            self.waiting[number] = [callback]
+            self.executor.submit(self.load, number)
+        return self.placeholder
+
+    def load(self, number):
+        # Worker thread: never touch Tk here
+        if self.closed.is_set():
+            return
+        img = load_thumbnail(number, self.thumbnails)
+        if not self.closed.is_set():
+            self.results.put((number, img))
+
+    def poll(self):
+        while True:
+            try:
+                number, img = self.results.get_nowait()
+            except queue.Empty:
+                break
+            photo = ImageTk.PhotoImage(img) if img is not None else None
+            self.photos[number] = photo
+            for callback in self.waiting.pop(number, ()):
+                callback(photo)
+        if not self.closed.is_set():
+            self.after_id = self.root.after(self.poll_ms, self.poll)
+
+    def close(self):
+        """
+        Stop polling and drop every load that hasn't started yet.
+        """
+        self.closed.set()
+        try:
+            self.root.after_cancel(self.after_id)
+        except tk.TclError:
+            pass  # the window is already gone
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def poke_info(poke):
+    return (
+        f"ID: {poke['ID']} | "
+        f"Name: {poke['Name']} | "
+        f"Type: {poke['Type']} | "
+        f"HP: {poke['HP']} | "
+        f"Attack: {poke['Attack']} | "
+        f"Can Evolve: {poke['Can Evolve']}"
+    )
+
+
+# Lists longer than this are shown virtualized by default
+VIRTUAL_MIN_ROWS = 50
+# Fixed height of one row in virtual mode: the 80px thumbnail plus border and padding
+ROW_HEIGHT = THUMBNAIL_SIZE + 24
+ROW_GAP = 10
+
+
+class VirtualPokemonList:
+    """
+    Scrolling list that only has enough row widgets to fill the canvas viewport.
+    The canvas scrollregion covers every row, and on every scroll or resize the
+    pooled rows are moved to the visible slots and refilled with that row's data.
+    """
+
+    def __init__(self, canvas, pokeList, thumbnails, loader=None):
+        self.canvas = canvas
+        self.pokeList = pokeList
+        self.thumbnails = thumbnails
+        self.loader = loader  # SpriteLoader => rows get their image once it is decoded
+        self.photos = {}  # sprite number -> PhotoImage, shared by every row showing it
+        self.rows = []    # (canvas window id, frame, text label, image label, shown index)
+        self.width = 1
+        canvas.configure(yscrollincrement=ROW_HEIGHT // 4)
+        self.set_scrollregion()
+
+    def set_scrollregion(self):
+        self.canvas.configure(scrollregion=(0, 0, self.width, len(self.pokeList) * (ROW_HEIGHT + ROW_GAP)))
+
+    def make_row(self):
+        frame = tk.Frame(self.canvas, bd=2, relief='groove', padx=5, pady=5, height=ROW_HEIGHT)
+        frame.pack_propagate(False)
+        label = tk.Label(frame, anchor="w")
+        label.pack(side="left", fill="x", expand=True)
+        picLabel = tk.Label(frame)
+        picLabel.pack(side="right", padx=5)
+        window = self.canvas.create_window((10, 0), window=frame, anchor="nw",
+                                           width=max(1, self.width - 20), height=ROW_HEIGHT)
+        return [window, frame, label, picLabel, None]
+
+    def photo(self, number, row):
+        if self.loader is not None:
+            index = row[4]
+
+            def on_loaded(photo):
+                if row[4] == index:  # the row may have been recycled meanwhile
+                    row[3].configure(image=photo if photo is not None else "")
+
+            return self.loader.request(number, on_loaded)
+        photo = self.photos.get(number)
+        if photo is None:
+            img = self.thumbnails.get(number)
+            if img is None:
+                return None
+            photo = self.photos[number] = ImageTk.PhotoImage(img)
+        return photo
+
+    def on_resize(self, event):
+        self.width = event.width
+        self.set_scrollregion()
+        for row in self.rows:
+            self.canvas.itemconfig(row[0], width=max(1, self.width - 20))
+        self.refresh()
+
+    def refresh(self, *args):
+        # Enough rows for the viewport plus one partially visible at each edge
+        stride = ROW_HEIGHT + ROW_GAP
+        needed = min(len(self.pokeList), self.canvas.winfo_height() // stride + 2)
+        while len(self.rows) < needed:
+            self.rows.append(self.make_row())
+        first = max(0, int(self.canvas.canvasy(0)) // stride)
+        for k, row in enumerate(self.rows):
+            index = first + k
+            if index >= len(self.pokeList):
+                self.canvas.itemconfig(row[0], state="hidden")
+                row[4] = None
+                continue
+            self.canvas.itemconfig(row[0], state="normal")
+            if row[4] == index:
+                continue
+            row[4] = index
+            poke = self.pokeList[index]
+            self.canvas.coords(row[0], 10, index * stride + ROW_GAP // 2)
+            row[2].configure(text=poke_info(poke))
+            photo = self.photo(poke['ID'] + 251, row)
+            row[3].configure(image=photo if photo is not None else "")
+
+
+def show_Pokedex_GUI(pokeList, virtual=None, background=True):
+    """
+    Display each Pokemon in a simple Tkinter window with its Name, Type, HP,
+    Attack, and optionally an image from the 'pokemons' folder.
+    We allow horizontal resizing so each Pokemon 'frame' expands in width.
+    virtual=True (the default for long lists) only builds the rows on screen and
+    reuses them while scrolling; virtual=False builds a frame per Pokemon.
+    background=True shows the text rows at once with placeholder images and loads
+    the sprites on worker threads; background=False loads them before the window opens.
+    """
+    if virtual is None:
+        virtual = len(pokeList) > VIRTUAL_MIN_ROWS
+
+    root = tk.Tk()
+    root.title("My Pokedex GUI")
+
+    # Create a canvas and a vertical scrollbar
+    canvas = tk.Canvas(root)
+    scrollbar = tk.Scrollbar(root, orient="vertical", command=canvas.yview)
+    canvas.configure(yscrollcommand=scrollbar.set)
+
+    # Mouse wheel handling
+    def on_mouse_wheel(event):
+        # On Windows/macOS: event.delta is typically ±120 per wheel step
+        canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+
+    canvas.bind_all("<MouseWheel>", on_mouse_wheel)  # Windows/macOS
+    # For Linux (buttons 4=up, 5=down):
+    canvas.bind_all("<Button-4>", lambda e: canvas.yview_scroll(-1, "units"))
+    canvas.bind_all("<Button-5>", lambda e: canvas.yview_scroll(1, "units"))
+
+    # Pack the canvas and scrollbar
+    canvas.pack(side="left", fill="both", expand=True)
+    scrollbar.pack(side="right", fill="y")
+
+    loader = None
+    if background:
+        # Never build the pack here: if it's stale the loader decodes the PNGs itself
+        loader = SpriteLoader(root, get_thumbnail_pack(build=False))
+        thumbnails = loader.thumbnails
+
+        def on_close():
+            loader.close()
+            root.destroy()
+
+        root.protocol("WM_DELETE_WINDOW", on_close)
+    else:
+        thumbnails = get_thumbnail_pack()
+
+    if virtual and pokeList:
+        rows = VirtualPokemonList(canvas, pokeList, thumbnails, loader)
+
+        # Refill the pooled rows whenever the view moves, then update the scrollbar
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            rows.refresh()
+
+        canvas.configure(yscrollcommand=on_scroll)
+        canvas.bind("<Configure>", rows.on_resize)
+        run_window(root, loader)
+        return
+
+    # This 'scrollable_frame' is where we'll place each Pokemon frame.
+    scrollable_frame = tk.Frame(canvas)
+
+    # A callback to update the scrollregion whenever 'scrollable_frame' changes size
+    def on_frame_configure(event):
+        canvas.configure(scrollregion=canvas.bbox("all"))
+
+    scrollable_frame.bind("<Configure>", on_frame_configure)
+
+    # Actually place 'scrollable_frame' in the canvas
+    # We'll store the canvas window ID so we can update its width on resize
+    canvas_window = canvas.create_window(
+        (0, 0), window=scrollable_frame, anchor="nw")
+
+    # A callback to keep the scrollable_frame the same width as the canvas
+    def on_canvas_configure(event):
+        # Set the scrollable_frame width to match canvas' width
+        canvas.itemconfig(canvas_window, width=event.width)
+
+    canvas.bind("<Configure>", on_canvas_configure)
+
+    if not pokeList:
+        msg = tk.Label(scrollable_frame, text="No Pokemon in this Pokedex!")
+        msg.pack(padx=10, pady=10)
+    else:
+        for poke in pokeList:
+            # Create a frame for each Pokémon, fill horizontally, expand so it can grow
+            frame = tk.Frame(scrollable_frame, bd=2,
+                             relief='groove', padx=5, pady=5)
+            frame.pack(side="top", fill="x", expand=True, padx=10, pady=5)
+
+            # The text label also fills horizontally and expands
+            label = tk.Label(frame, text=poke_info(poke), anchor="w")
+            label.pack(side="left", fill="x", expand=True)
+
+            if loader is not None:
+                # Placeholder now, the sprite once a worker has it (dropped if missing)
+                picLabel = tk.Label(frame)
+                picLabel.pack(side="right", padx=5)
+
+                def on_loaded(photo, picLabel=picLabel):
+                    if photo is None:
+                        picLabel.pack_forget()
+                    else:
+                        picLabel.configure(image=photo)
+
+                photo = loader.request(poke['ID'] + 251, on_loaded)
+                on_loaded(photo)
+                continue
+
+            # Pre-resized thumbnail from the pack; sprites that don't exist are skipped
+            img = thumbnails.get(poke['ID'] + 251)
+            if img is not None:
+                photo = ImageTk.PhotoImage(img)
+                picLabel = tk.Label(frame, image=photo)
+                picLabel.photo = photo  # keep reference
+                picLabel.pack(side="right", padx=5)
+
+    run_window(root, loader)
+
+
+def run_window(root, loader):
+    try:
+        root.mainloop()
+    finally:
+        if loader is not None and not loader.closed.is_set():
+            loader.close()
+
+
+if __name__ == "__main__":
+    # Build (or refresh) the thumbnail pack ahead of time
+    build_thumbnail_pack()
+    print(f"Wrote {THUMBNAIL_PACK}")
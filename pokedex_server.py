@@ -0,0 +1,232 @@
+# pokedex_server.py
+#
+# Serve the ex7 registry to many clients at once over TCP or a Unix socket.
+#   python pokedex_server.py --port 7007
+#   python pokedex_server.py --unix /tmp/pokedex.sock --data-dir data
+# One command per line, in the same JSON / CSV format as pokedex_batch, plus:
+#   {"op": "owners", "order": "in"}        (every owner with its Pokedex size; pre/in/post/bfs)
+#   {"op": "by_count", "reverse": false}   (owners by number of Pokemon)
+#   {"op": "range", "low": "a", "high": "c"}  /  {"op": "prefix", "prefix": "ash"}
+#   {"op": "page", "cursor": null, "limit": 50}  (reply has "cursor" for the next page)
+# One NDJSON reply per line: {"ok": true, "op": ..., ...} or {"ok": false, "error": ...}.
+
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import ex7
+import pokedex_batch
+
+READ_OPS = ("query", "owners", "by_count", "range", "prefix", "page", "holders")
+# Full listings: run on a snapshot (ex7.snapshot_owners) after the lock is released.
+# by_count isn't one: the count index is a scan in order, cheaper than sorting a snapshot
+SNAPSHOT_OPS = ("owners",)
+WRITE_OPS = ("create", "add", "release", "evolve", "evolve_all", "delete")
+# Types of the fields only the server's ops use (the batch ones are checked by parse_command)
+SERVER_FIELD_TYPES = {"low": str, "high": str, "prefix": str, "cursor": str,
+                      "order": str, "limit": int}
+
+
+class ReadWriteLock:
+    """
+    Many readers or one writer. Writers are preferred: once a writer is waiting, new
+    readers wait too, so a steady stream of reads can't starve the writes.
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.readers = 0
+        self.writing = False
+        self.writers_waiting = 0
+
+    def acquire_read(self):
+        with self.cond:
+            while self.writing or self.writers_waiting:
+                self.cond.wait()
+            self.readers += 1
+
+    def release_read(self):
+        with self.cond:
+            self.readers -= 1
+            if self.readers == 0:
+                self.cond.notify_all()
+
+    def acquire_write(self):
+        with self.cond:
+            self.writers_waiting += 1
+            while self.writing or self.readers:
+                self.cond.wait()
+            self.writers_waiting -= 1
+            self.writing = True
+
+    def release_write(self):
+        with self.cond:
+            self.writing = False
+            self.cond.notify_all()
+
+
+registryLock = ReadWriteLock()
+
+
+def run_snapshot_read(command, snapshot):
+    """
+    Run a full listing against a snapshot. Needs no lock: snapshots never change.
+    """
+    order = command.get("order", "in")
+    if order not in ex7.TRAVERSALS:
+        raise ValueError(f"Unknown order '{order}' (expected one of {', '.join(ex7.TRAVERSALS)}).")
+    return {"owners": [[node['owner'], len(node['pokedex'])]
+                       for node in ex7.TRAVERSALS[order](snapshot)]}
+
+
+def run_read(command):
+    """
+    Run a read-only command. Must hold the read lock.
+    """
+    op = command.get("op")
+    if op == "range":
+        nodes = ex7.range_owners_bst(ex7.ownerRoot, command["low"], command["high"])
+        return {"owners": [[node['owner'], len(node['pokedex'])] for node in nodes]}
+    elif op == "prefix":
+        nodes = ex7.prefix_owners_bst(ex7.ownerRoot, command["prefix"])
+        return {"owners": [[node['owner'], len(node['pokedex'])] for node in nodes]}
+    elif op == "by_count":
+        return {"owners": [list(entry) for entry in
+                           ex7.iter_owners_by_num_pokemon(reverse=bool(command.get("reverse")))]}
+    elif op == "page":
+        nodes, cursor = ex7.page_owners_bst(ex7.ownerRoot, command.get("cursor"), int(command.get("limit", 50)))
+        return {"owners": [[node['owner'], len(node['pokedex'])] for node in nodes], "cursor": cursor}
+    return pokedex_batch.run_command(command)
+
+
+def execute(command):
+    """
+    Run one command under the registry lock: reads share it, writes (and the
+    mutation hooks they fire, e.g. the journal) hold it alone.
+    """
+    op = command.get("op")
+    if op in SNAPSHOT_OPS:
+        #only taking the snapshot needs the lock, so writers never wait for a long listing
+        registryLock.acquire_read()
+        try:
+            snapshot = ex7.snapshot_owners()
+        finally:
+            registryLock.release_read()
+        return run_snapshot_read(command, snapshot)
+    elif op in READ_OPS:
+        registryLock.acquire_read()
+        try:
+            return run_read(command)
+        finally:
+            registryLock.release_read()
+    elif op in WRITE_OPS:
+        registryLock.acquire_write()
+        try:
+            return pokedex_batch.run_command(command)
+        finally:
+            registryLock.release_write()
+    raise ValueError(f"Unknown op '{op}' (expected one of {', '.join(READ_OPS + WRITE_OPS)}).")
+
+
+def handle_line(line):
+    """
+    Parse and run one request line. Return the reply line, or None for blank lines.
+    """
+    try:
+        command = pokedex_batch.parse_command(line)
+        if command is None:
+            return None
+        pokedex_batch.check_fields(command, SERVER_FIELD_TYPES)
+        reply = {"ok": True, "op": command.get("op"), **execute(command)}
+    except (ValueError, LookupError, KeyError, TypeError) as e:
+        reply = {"ok": False, "error": str(e)}
+    except Exception as e:
+        #never let one bad request end the session without a reply
+        reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    return json.dumps(reply) + "\n"
+
+
+class PokedexServer:
+    """
+    asyncio front end: every connection is a session, every request line runs on a
+    worker thread so a long read (e.g. a query over all owners) never stalls the loop.
+    """
+
+    def __init__(self, workers=8):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.server = None
+        self.sessions = 0
+
+    async def handle_client(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        self.sessions += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = await loop.run_in_executor(self.executor, handle_line, line.decode('utf-8'))
+                if reply is not None:
+                    writer.write(reply.encode('utf-8'))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=7007, unix_path=None):
+        ex7.enable_snapshots()
+        if unix_path is not None:
+            if os.path.exists(unix_path):
+                os.remove(unix_path)
+            self.server = await asyncio.start_unix_server(self.handle_client, path=unix_path)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=True)
+
+
+async def serve(host, port, unix_path, workers):
+    ex7.get_species_index()  # load the species table once, before the workers can race on it
+    server = PokedexServer(workers)
+    await server.start(host, port, unix_path)
+    where = unix_path or "%s:%d" % server.server.sockets[0].getsockname()[:2]
+    print(f"Pokedex server listening on {where}", flush=True)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve the Pokedex registry to concurrent clients.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7007)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=8, help="threads running requests")
+    parser.add_argument("--data-dir", help="load/journal the registry in this directory (see pokedex_storage)")
+    args = parser.parse_args(argv)
+    store = None
+    if args.data_dir is not None:
+        import pokedex_storage
+        store, _ = pokedex_storage.open_store(args.data_dir)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if store is not None:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
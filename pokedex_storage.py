@@ -0,0 +1,292 @@
+# pokedex_storage.py
+
+import json
+import os
+import time
+
+import ex7
+
+SNAPSHOT_NAME = "owners.snapshot"
+JOURNAL_NAME = "owners.journal"
+SNAPSHOT_VERSION = 1
+
+
+class OwnerStore:
+    """
+    Durable storage for the ex7 owner registry.
+
+    Every registry change is appended to an append-only journal, one JSON record per line:
+      [seq, op, owner_name, [ids]]
+    An evolve is one record, [seq, "evolve", owner_name, [old, new, ...]], so a crash
+    never recovers a Pokemon that was released but not evolved.
+    The journal is fsync'ed every `fsync_every` records (and on sync/close). Every
+    `snapshot_every` records the whole registry is written to a compacted snapshot
+    (owners in name order) and the journal is truncated, so a restart only replays
+    the records after the snapshot.
+    """
+
+    def __init__(self, directory, fsync_every=256, snapshot_every=100000):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self.fsync_every = fsync_every
+        self.snapshot_every = snapshot_every
+        self.seq = 0
+        self.snapshot_seq = 0
+        self.journal = None
+        self.unsynced = 0
+        self.since_snapshot = 0
+        self.stats = {"records": 0, "logical_bytes": 0, "journal_bytes": 0,
+                      "snapshot_bytes": 0, "snapshots": 0, "fsyncs": 0}
+
+    ########################
+    # Recovery
+    ########################
+
+    def recover(self):
+        """
+        Rebuild ex7.ownerRoot from the snapshot (in one O(n) bulk build) plus the journal
+        tail. Return timing/size stats for the recovery.
+        """
+        start = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+        snapshot_owners = self.load_snapshot()
+        snapshot_done = time.perf_counter()
+        replayed, skipped = self.replay_journal()
+        return {"snapshot_owners": snapshot_owners,
+                "journal_replayed": replayed,
+                "journal_skipped": skipped,
+                "snapshot_seconds": snapshot_done - start,
+                "replay_seconds": time.perf_counter() - snapshot_done,
+                "total_seconds": time.perf_counter() - start}
+
+    def load_snapshot(self):
+        records = []
+        self.snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                if header.get("version") != SNAPSHOT_VERSION:
+                    raise ValueError(f"Unsupported snapshot version {header.get('version')}.")
+                self.snapshot_seq = header["seq"]
+                for line in f:
+                    records.append(json.loads(line))
+        #the snapshot is written in name order => no sorting, no per-owner inserts
+        ex7.clear_registry()
+        ex7.bulk_load_owners(records, presorted=True)
+        self.seq = self.snapshot_seq
+        return len(records)
+
+    def replay_journal(self):
+        replayed = skipped = 0
+        if not os.path.exists(self.journal_path):
+            return replayed, skipped
+        good_bytes = 0  # end of the last complete record
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn write at the tail from a crash => stop here
+                try:
+                    seq, op, owner_name, ids = json.loads(line)
+                except ValueError:
+                    break
+                good_bytes += len(line)
+                if seq <= self.snapshot_seq:
+                    skipped += 1  # already in the snapshot
+                    continue
+                apply_mutation(op, owner_name, ids)
+                self.seq = seq
+                replayed += 1
+        #cut the torn tail off, or the next appended record would be glued onto it
+        if os.path.getsize(self.journal_path) > good_bytes:
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good_bytes)
+                f.flush()
+                os.fsync(f.fileno())
+        self.since_snapshot = replayed
+        return replayed, skipped
+
+    ########################
+    # Journal
+    ########################
+
+    def attach(self):
+        """
+        Start journaling every ex7 registry change. Call after recover().
+        """
+        self.journal = open(self.journal_path, 'a', encoding='utf-8', buffering=1 << 20)
+        ex7.mutationHooks.append(self.record)
+
+    def detach(self):
+        if self.record in ex7.mutationHooks:
+            ex7.mutationHooks.remove(self.record)
+
+    def record(self, op, owner_name, ids=()):
+        """
+        Mutation hook: append one record, fsync in batches, snapshot when due.
+        """
+        self.seq += 1
+        line = json.dumps([self.seq, op, owner_name, list(ids)], separators=(',', ':')) + "\n"
+        self.journal.write(line)
+        size = len(line.encode('utf-8'))
+        self.stats["records"] += 1
+        self.stats["logical_bytes"] += size
+        self.stats["journal_bytes"] += size
+        self.unsynced += 1
+        self.since_snapshot += 1
+        if self.unsynced >= self.fsync_every:
+            self.sync()
+        if self.since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def sync(self):
+        """
+        Make every journaled record durable.
+        """
+        if self.journal is None or self.unsynced == 0:
+            return
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.stats["fsyncs"] += 1
+        self.unsynced = 0
+
+    ########################
+    # Snapshots
+    ########################
+
+    def snapshot(self):
+        """
+        Write the whole registry to a new snapshot, then truncate the journal.
+        """
+        self.sync()
+        temp_path = self.snapshot_path + ".tmp"
+        written = 0
+        with open(temp_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            written += f.write(json.dumps({"version": SNAPSHOT_VERSION, "seq": self.seq}) + "\n")
+            for node in ex7.iter_in_order(ex7.ownerRoot):
+                written += f.write(json.dumps([node['owner'], list(node['pokedex'])],
+                                              separators=(',', ':')) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        fsync_directory(self.directory)
+        self.snapshot_seq = self.seq
+        #everything up to self.seq is in the snapshot now, the journal can start over
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = open(self.journal_path, 'w', encoding='utf-8', buffering=1 << 20)
+        else:
+            open(self.journal_path, 'w').close()
+        self.since_snapshot = 0
+        self.stats["snapshot_bytes"] += written
+        self.stats["snapshots"] += 1
+        self.stats["fsyncs"] += 2
+
+    def write_amplification(self):
+        """
+        Bytes written to disk (journal + snapshots) per byte of journaled change.
+        """
+        if self.stats["logical_bytes"] == 0:
+            return 0.0
+        physical = self.stats["journal_bytes"] + self.stats["snapshot_bytes"]
+        return physical / self.stats["logical_bytes"]
+
+    def close(self):
+        self.detach()
+        self.sync()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+
+def fsync_directory(directory):
+    # Makes a rename durable on POSIX; not supported (nor needed) on Windows
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def apply_mutation(op, owner_name, ids):
+    """
+    Apply one journal record to the ex7 registry, without prompting or printing.
+    """
+    if op == "create":
+        ex7.add_owner(ex7.new_owner_node(owner_name, [ex7.get_poke_dict_by_id(i) for i in ids]))
+    elif op == "delete":
+        ex7.ownerRoot = ex7.delete_owner_bst(ex7.ownerRoot, owner_name)
+    elif op in ("add", "release", "evolve"):
+        owner_node = ex7.find_owner(owner_name)
+        if owner_node is None:
+            return
+        if op == "evolve":
+            for old_id, new_id in zip(ids[::2], ids[1::2]):
+                ex7.pokedex_remove(owner_node, old_id)
+                ex7.pokedex_add(owner_node, ex7.get_poke_dict_by_id(new_id))
+            return
+        for poke_id in ids:
+            if op == "add":
+                ex7.pokedex_add(owner_node, ex7.get_poke_dict_by_id(poke_id))
+            else:
+                ex7.pokedex_remove(owner_node, poke_id)
+    else:
+        raise ValueError(f"Unknown journal op '{op}'.")
+
+
+def open_store(directory, **options):
+    """
+    Recover the registry from directory and start journaling to it.
+    Return (store, recovery stats).
+    """
+    store = OwnerStore(directory, **options)
+    recovery = store.recover()
+    store.attach()
+    return store, recovery
+
+
+def measure(directory, owners, tail, seed=7):
+    """
+    Build a registry of `owners` owners, snapshot it, make `tail` more changes, then
+    recover from disk. Return write-amplification and recovery stats as a dict.
+    """
+    import random
+    import shutil
+    rng = random.Random(seed)
+    shutil.rmtree(directory, ignore_errors=True)
+    ex7.clear_registry()
+    data = ex7.get_hoenn_data()
+    store, _ = open_store(directory, snapshot_every=owners + tail + 1)
+    start = time.perf_counter()
+    for i in range(owners):
+        ex7.add_owner(ex7.new_owner_node(f"owner{i:07d}", rng.sample(data, rng.randint(1, 6))))
+    store.snapshot()
+    for _ in range(tail):
+        owner_node = ex7.find_owner(f"owner{rng.randrange(owners):07d}")
+        if owner_node is not None:
+            ex7.pokedex_add(owner_node, rng.choice(data))
+    store.close()
+    write_seconds = time.perf_counter() - start
+    result = {"owners": owners, "tail": tail, "write_seconds": write_seconds,
+              "write_amplification": store.write_amplification(), **store.stats}
+    ex7.clear_registry()
+    store, recovery = open_store(directory)
+    store.close()
+    result.update(recovery)
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+    parser = argparse.ArgumentParser(description="Measure journal/snapshot write amplification and recovery time.")
+    parser.add_argument("--owners", type=int, default=100000)
+    parser.add_argument("--tail", type=int, default=10000, help="changes made after the last snapshot")
+    parser.add_argument("--dir", default=os.path.join(tempfile.gettempdir(), "ex7_store_bench"))
+    args = parser.parse_args()
+    print(json.dumps(measure(args.dir, args.owners, args.tail), indent=2))
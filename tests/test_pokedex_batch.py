@@ -0,0 +1,41 @@
+# test_pokedex_batch.py
+
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ex7
+import pokedex_batch
+
+
+def test_badly_typed_record_does_not_stop_the_batch():
+    ex7.clear_registry()
+    lines = ['{"op": "create", "owner": "ash", "starter": 1}',
+             '{"op": "release", "owner": "ash", "name": 5}',
+             '{"op": "add", "owner": "ash", "ids": [4, "x"]}',
+             'add,ash,4']
+    out = io.StringIO()
+    summary = pokedex_batch.run_batch(lines, out)
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r.get("ok") for r in results[:4]] == [True, False, False, True]
+    assert results[-1] == {"summary": summary}
+    assert summary["errors"] == 2
+    assert list(ex7.find_owner("ash")['pokedex']) == [1, 4]
+    ex7.clear_registry()
+
+
+def test_add_with_an_unknown_id_changes_nothing():
+    ex7.clear_registry()
+    lines = ['{"op": "create", "owner": "ash", "starter": 1}',
+             '{"op": "add", "owner": "ash", "ids": [4, 999]}',
+             '{"op": "add", "owner": "ash"',
+             '',
+             'add,ash,7']
+    out = io.StringIO()
+    summary = pokedex_batch.run_batch(lines, out)
+    assert list(ex7.find_owner("ash")['pokedex']) == [1, 7]
+    assert (summary["commands"], summary["errors"]) == (4, 2)
+    ex7.clear_registry()
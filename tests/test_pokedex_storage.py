@@ -0,0 +1,59 @@
+# test_pokedex_storage.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ex7
+import pokedex_storage
+
+
+def owners():
+    return {node['owner']: list(node['pokedex']) for node in ex7.iter_in_order(ex7.ownerRoot)}
+
+
+def test_recover_twice_after_torn_tail(tmp_path):
+    directory = str(tmp_path)
+    ex7.clear_registry()
+    store, _ = pokedex_storage.open_store(directory)
+    ex7.add_owner(ex7.new_owner_node("alice", [ex7.get_poke_dict_by_id(1)]))
+    ex7.add_owner(ex7.new_owner_node("bob", [ex7.get_poke_dict_by_id(4)]))
+    store.close()
+    #crash in the middle of writing the third record
+    with open(os.path.join(directory, pokedex_storage.JOURNAL_NAME), 'a', encoding='utf-8') as f:
+        f.write('[3,"create","car')
+
+    ex7.clear_registry()
+    store, recovery = pokedex_storage.open_store(directory)
+    assert recovery["journal_replayed"] == 2
+    ex7.add_owner(ex7.new_owner_node("dave", [ex7.get_poke_dict_by_id(7)]))
+    store.close()
+
+    ex7.clear_registry()
+    store, recovery = pokedex_storage.open_store(directory)
+    store.close()
+    assert recovery["journal_replayed"] == 3
+    assert owners() == {"alice": [1], "bob": [4], "dave": [7]}
+    ex7.clear_registry()
+
+
+def test_evolve_is_one_journal_record(tmp_path):
+    directory = str(tmp_path)
+    ex7.clear_registry()
+    store, _ = pokedex_storage.open_store(directory)
+    ex7.add_owner(ex7.new_owner_node("alice", [ex7.get_poke_dict_by_id(1), ex7.get_poke_dict_by_id(4)]))
+    ex7.evolve_pokemon(ex7.find_owner("alice"), "Treecko")
+    ex7.evolve_all_pokemon(ex7.find_owner("alice"))
+    expected = owners()
+    store.close()
+    with open(os.path.join(directory, pokedex_storage.JOURNAL_NAME), encoding='utf-8') as f:
+        ops = [line.split(",")[1] for line in f]
+    assert ops == ['"create"', '"evolve"', '"evolve"']
+
+    ex7.clear_registry()
+    store, recovery = pokedex_storage.open_store(directory)
+    store.close()
+    assert recovery["journal_replayed"] == 3
+    assert owners() == expected
+    ex7.clear_registry()